@@ -0,0 +1,60 @@
+import logging
+import os
+
+from .client import OnetClient
+from .config import env_bool, env_str
+from .offline import OfflineOnetClient
+from .reverse_index import ReverseIndex
+from .search_index import SearchIndex
+from .similarity import SimilarityIndex
+
+logger = logging.getLogger("onet-server")
+
+
+def create_backend():
+    """
+    Sélectionne la source de données selon ONET_BACKEND :
+    - "api" (défaut) : API O*NET Web Services (OnetClient)
+    - "offline" : base locale SQLite (ONET_OFFLINE_DB), avec repli optionnel
+      sur l'API pour les codes absents (ONET_OFFLINE_FALLBACK, si ONET_API_KEY est défini)
+    """
+    mode = env_str("ONET_BACKEND", "api").lower()
+
+    # Index de recherche pré-construit (optionnel, voir `python -m app.ingest --search-index`)
+    index_path = env_str("ONET_SEARCH_INDEX")
+    search_index = SearchIndex.load(index_path) if index_path else None
+    if search_index is not None:
+        logger.info(f"Index de recherche local chargé : {len(search_index)} métiers")
+
+    # Index des métiers proches pré-construit (optionnel, voir `python -m app.ingest --similarity-index`),
+    # mis en mémoire (mmap) puis complété au fil des rapports et réécrit à l'arrêt
+    similarity_path = env_str("ONET_SIMILARITY_INDEX")
+    similarity_index = None
+    if similarity_path and os.path.isfile(similarity_path):
+        similarity_index = SimilarityIndex.load(similarity_path)
+        logger.info(f"Index de similarité chargé : {len(similarity_index)} métiers")
+
+    # Index inversé technologies / compétences / connaissances / DWA (idem, `--reverse-index`)
+    reverse_path = env_str("ONET_REVERSE_INDEX")
+    reverse_index = None
+    if reverse_path and os.path.isfile(reverse_path):
+        reverse_index = ReverseIndex.load(reverse_path)
+        logger.info(f"Index inversé chargé : {len(reverse_index)} métiers")
+
+    if mode == "api":
+        return OnetClient(search_index=search_index,
+                          similarity_index=similarity_index if similarity_index is not None else SimilarityIndex(),
+                          reverse_index=reverse_index if reverse_index is not None else ReverseIndex())
+
+    if mode == "offline":
+        fallback = None
+        if env_bool("ONET_OFFLINE_FALLBACK", True) and os.getenv("ONET_API_KEY"):
+            fallback = OnetClient()
+        backend = OfflineOnetClient(env_str("ONET_OFFLINE_DB", "data/onet.sqlite"),
+                                    fallback=fallback, search_index=search_index,
+                                    similarity_index=similarity_index, reverse_index=reverse_index)
+        logger.info(f"Mode hors ligne : release O*NET {backend.version}"
+                    f"{' (repli API actif)' if fallback else ''}")
+        return backend
+
+    raise ValueError(f"ONET_BACKEND invalide : '{mode}' (attendu : api ou offline)")
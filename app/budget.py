@@ -0,0 +1,267 @@
+"""
+Rendu compact sous budget de taille (caractères ou tokens estimés).
+
+Chaque section fournit ses éléments dans l'ordre du rapport, paresseusement : les
+modèles étant déjà triés (app/models.py), prendre les k premiers est une simple
+tranche ; les outils de toutes les catégories technologiques sont fusionnés par
+heapq.merge sans tri global. Les éléments sont ensuite retenus à tour de rôle entre
+sections tant qu'ils tiennent dans le budget.
+
+Styles : "markdown" (lignes du rapport standard), "terse" (sans descriptions ni
+emojis) et "json" (objets structurés).
+"""
+import heapq
+import json
+from itertools import islice
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from .models import Summary, is_error, tool_score
+
+STYLES = ("markdown", "terse", "json")
+
+# Estimation grossière pour les modèles de langage (anglais) : ~4 caractères par token
+CHARS_PER_TOKEN = 4
+
+# Plafonds par section (ceux du rapport standard, sauf technology_skills : le rapport standard garde
+# 6 outils par catégorie, ici 30 outils toutes catégories confondues) ; None = liste entière
+LIMITS = {"tasks": 15, "work_activities": 12, "detailed_work_activities": 35, "technology_skills": 30,
+          "skills": 12, "abilities": 12, "knowledge": 12, "work_context": 10, "education": None}
+
+
+class Item(NamedTuple):
+    markdown: str
+    terse: str
+    data: Dict[str, Any]
+
+
+def check_style(style: str) -> None:
+    if style not in STYLES:
+        raise ValueError(f"Format inconnu : '{style}' (attendu : {', '.join(STYLES)})")
+
+
+def budget_chars(max_chars: Optional[int] = None, max_tokens: Optional[int] = None) -> Optional[int]:
+    """Budget en caractères (le plus strict des deux), None = illimité."""
+    limits = [n for n in (max_chars, (max_tokens * CHARS_PER_TOKEN) if max_tokens else None) if n]
+    return min(limits) if limits else None
+
+
+# --- Éléments de chaque section, dans l'ordre du rapport ---
+
+def _job_zone(model) -> Iterator[Item]:
+    yield Item(f"**Zone {model.code} : {model.title}** (SVP Range: {model.svp_range})\n"
+               f"- **Éducation** : {model.education}",
+               f"Zone {model.code} : {model.title}",
+               {"zone": model.code, "title": model.title, "education": model.education})
+
+
+def _tasks(model) -> Iterator[Item]:
+    for task in model.items:
+        prefix = "🔹" if task.category == "Core" else "🔸"
+        yield Item(f"{prefix} **{task.title}** (Imp: {task.importance})", f"- {task.title} ({task.importance})",
+                   {"task": task.title, "importance": task.importance, "category": task.category})
+
+
+def _elements(model) -> Iterator[Item]:
+    for element in model.items:
+        yield Item(f"- **{element.name}** ({element.importance}/100): {element.description}",
+                   f"- {element.name} ({element.importance})",
+                   {"name": element.name, "importance": element.importance})
+
+
+def _dwa(model) -> Iterator[Item]:
+    for activity in model.items:
+        if activity.title:
+            yield Item(f"- {activity.title}", f"- {activity.title}", {"activity": activity.title})
+
+
+def _category_tools(cat) -> Iterator[Tuple[Any, str]]:
+    for tool in cat.tools:
+        yield tool, cat.title
+
+
+def _technology(model) -> Iterator[Item]:
+    # Outils de chaque catégorie déjà triés : fusion paresseuse de ces listes par score décroissant
+    tools = heapq.merge(*(_category_tools(cat) for cat in model.items),
+                        key=lambda pair: tool_score(pair[0]), reverse=True)
+    for tool, category in tools:
+        markers = ("🔥" if tool.hot_technology else "") + ("📈" if tool.in_demand else "")
+        display = " ".join(part for part in (f"**{tool.title}**", markers,
+                                             f"({tool.percentage}%)" if tool.percentage > 0 else "") if part)
+        yield Item(f"- {display} — {category}",
+                   f"- {tool.title} ({category})",
+                   {"tool": tool.title, "category": category, "hot": tool.hot_technology,
+                    "in_demand": tool.in_demand, "percentage": tool.percentage})
+
+
+def _work_context(model) -> Iterator[Item]:
+    for element in model.items:
+        if element.responses:
+            top = element.responses[0]
+            yield Item(f"- **{element.name}**: {top.description} ({top.percentage}%)",
+                       f"- {element.name}: {top.description}",
+                       {"name": element.name, "response": top.description, "percentage": top.percentage})
+        else:
+            yield Item(f"- **{element.name}**", f"- {element.name}", {"name": element.name})
+
+
+def _education(model) -> Iterator[Item]:
+    for level in model.items:
+        if level.percentage > 0:
+            yield Item(f"- **{level.title}** ({level.percentage}%)", f"- {level.title} ({level.percentage}%)",
+                       {"level": level.title, "percentage": level.percentage})
+
+
+ITEMS = {
+    "job_zone": _job_zone,
+    "tasks": _tasks,
+    "work_activities": _elements,
+    "detailed_work_activities": _dwa,
+    "technology_skills": _technology,
+    "skills": _elements,
+    "abilities": _elements,
+    "knowledge": _elements,
+    "work_context": _work_context,
+    "education": _education,
+}
+
+
+# --- Sélection sous budget ---
+
+def _truncate(text: str, size: int) -> str:
+    if size <= 0:
+        return ""
+    return text if len(text) <= size else text[:size - 1].rstrip() + "…"
+
+
+def _size(item: Item, style: str) -> int:
+    if style == "json":
+        return len(json.dumps(item.data, ensure_ascii=False, separators=(",", ":"))) + 1
+    return len(item.markdown if style == "markdown" else item.terse) + 1
+
+
+def select_items(sections: List[Tuple[str, str, Any]], style: str, budget: Optional[int],
+                 used: int, complete: bool = False) -> Tuple[Dict[str, List[Item]], List[str]]:
+    """
+    Retient les éléments de chaque section (clé, titre, modèle) à tour de rôle tant qu'ils tiennent
+    dans `budget` (déjà consommé : `used`). Retourne (éléments par section, sections omises).
+    Une section dont l'élément suivant ne tient plus est close ; son titre n'est compté
+    qu'avec son premier élément.
+    """
+    iterators = {}
+    for key, _heading, model in sections:
+        limit = None if complete else LIMITS.get(key)
+        iterators[key] = islice(ITEMS[key](model), limit)
+    # Coût fixe d'une section : "\n## titre\n" (Markdown), "\n## clé\n" (terse) ou "clé":[...], (JSON)
+    headings = {key: (len(heading) + 5 if style == "markdown" else len(key) + 5) for key, heading, _ in sections}
+
+    chosen: Dict[str, List[Item]] = {key: [] for key in iterators}
+    while iterators:
+        for key in list(iterators):
+            item = next(iterators[key], None)
+            if item is None:
+                del iterators[key]
+                continue
+            cost = _size(item, style) + (0 if chosen[key] else headings[key])
+            if budget is not None and used + cost > budget:
+                del iterators[key]
+                continue
+            chosen[key].append(item)
+            used += cost
+    omitted = [key for key, items in chosen.items() if not items]
+    return {key: items for key, items in chosen.items() if items}, omitted
+
+
+def _header(summary: Summary, style: str, description: str) -> str:
+    if style == "terse":
+        return f"# {summary.title} ({summary.code})\n" + (f"{description}\n" if description else "")
+    return f"# FICHE MÉTIER : {summary.title} **Code SOC** : {summary.code}\n" + \
+        (f"\n{description}\n" if description else "")
+
+
+def _samples_line(titles: Tuple[str, ...], room: Optional[int]) -> str:
+    """Ligne des titres similaires, réduite aux premiers titres qui tiennent dans `room` caractères."""
+    line = ""
+    for count in range(1, len(titles) + 1):
+        candidate = f"\n📌 Titres similaires : {', '.join(titles[:count])}\n"
+        if room is not None and len(candidate) > room:
+            break
+        line = candidate
+    return line
+
+
+def _drop_one(chosen: Dict[str, List[Item]], keep: int) -> bool:
+    """
+    Retire le dernier élément de la section la plus fournie, si elle en a plus de `keep`
+    (à égalité, la section la plus loin dans le rapport).
+    """
+    key = max(reversed(list(chosen)), key=lambda k: len(chosen[k]), default=None)
+    if key is None or len(chosen[key]) <= keep:
+        return False
+    chosen[key].pop()
+    return True
+
+
+def render_budgeted(summary: Summary, data: Dict, sections: List[Tuple[str, str]], style: str = "markdown",
+                    budget: Optional[int] = None, complete: bool = False) -> str:
+    """
+    Rapport compact : en-tête, puis les meilleurs éléments de chaque section dans la limite de `budget`
+    caractères, en-tête compris. `sections` : (clé, titre Markdown) dans l'ordre d'affichage.
+    Priorités : titre, premier élément de chaque section, description (au plus un tiers du budget),
+    éléments suivants, puis titres similaires (Markdown). Les sections sans élément retenu
+    sont toujours signalées.
+    """
+    check_style(style)
+    available = [(key, heading, data.get(key)) for key, heading in sections if not is_error(data.get(key))]
+    unavailable = [key for key, _heading in sections if is_error(data.get(key))]
+    description = summary.description or ""
+
+    def assemble(description: str, chosen: Dict[str, List[Item]], note: str = "list") -> str:
+        # note : "list" (sections omises nommées), "count" (leur nombre seulement) ou "" (aucune)
+        omitted = [key for key, _heading, _model in available if not chosen.get(key)] + unavailable
+        if style == "json":
+            report = {"code": summary.code, "title": summary.title, "description": description,
+                      "sections": {key: [item.data for item in items] for key, items in chosen.items() if items}}
+            if omitted and note:
+                report["omitted"] = omitted if note == "list" else len(omitted)
+            return json.dumps(report, ensure_ascii=False, separators=(",", ":"))
+        parts = [_header(summary, style, description)]
+        for key, heading, _model in available:
+            if chosen.get(key):
+                title = key if style == "terse" else heading
+                lines = [item.markdown if style == "markdown" else item.terse for item in chosen[key]]
+                parts.append(f"\n## {title}\n" + "\n".join(lines) + "\n")
+        if omitted and note == "list":
+            parts.append(f"\n(Sections omises : {', '.join(omitted)})\n")
+        elif omitted and note:
+            parts.append(f"\n({len(omitted)} sections omises)\n")
+        return "".join(parts)
+
+    if budget is not None:
+        # La description prend au plus le tiers du budget, après le premier élément de chaque section
+        first = {key: list(islice(ITEMS[key](model), 1)) for key, _heading, model in available}
+        base = len(assemble("", first))
+        limit = min(budget // 3, budget - base)
+        description = _truncate(description, limit)
+        while description and len(assemble(description, first)) > base + limit:
+            limit -= len(assemble(description, first)) - (base + limit)
+            description = _truncate(description, limit)
+
+    chosen, _omitted = select_items(available, style, budget, len(assemble(description, {}, note="")), complete)
+    text = assemble(description, chosen)
+    # La note des sections omises (comptée après la sélection) doit aussi tenir : éléments au-delà
+    # du premier retirés, puis note réduite au nombre de sections, puis premiers éléments retirés
+    note = "list"
+    for keep in (1, 0):
+        while budget is not None and len(text) > budget and _drop_one(chosen, keep):
+            text = assemble(description, chosen, note)
+        if budget is not None and len(text) > budget:
+            note = "count"
+            text = assemble(description, chosen, note)
+
+    if style == "markdown":
+        samples = _samples_line(summary.sample_titles, None if budget is None else budget - len(text))
+        if not samples and budget is None:
+            samples = "\n📌 Titres similaires : Aucun titre similaire disponible.\n"
+        header = _header(summary, style, description)
+        text = header + samples + text[len(header):]
+    return text
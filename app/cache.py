@@ -0,0 +1,180 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from .config import env_float, env_int
+
+
+def endpoint_kind(endpoint: str) -> str:
+    """
+    Catégorie d'un endpoint O*NET (sert aux TTL par endpoint).
+    - /online/search                          -> "search"
+    - /online/occupations/{code}              -> "summary"
+    - /online/occupations/{code}/details/xxx  -> "xxx"
+    """
+    parts = [p for p in endpoint.split("/") if p]
+    if "search" in parts:
+        return "search"
+    if "details" in parts and parts[-1] != "details":
+        return parts[-1]
+    if len(parts) >= 3 and parts[-2] == "occupations":
+        return "summary"
+    return parts[-1] if parts else ""
+
+
+def _normalize_value(name: str, value: Any) -> str:
+    text = str(value).strip()
+    # Les mots-clés ne dépendent ni de la casse ni des espaces multiples
+    if name == "keyword":
+        text = " ".join(text.lower().split())
+    return text
+
+
+class CacheEntry:
+    __slots__ = ("value", "size", "fresh_until", "expires_at")
+
+    def __init__(self, value: Dict, size: int, fresh_until: float, expires_at: float):
+        self.value = value
+        self.size = size
+        self.fresh_until = fresh_until
+        self.expires_at = expires_at
+
+
+class ResponseCache:
+    """
+    Cache mémoire TTL + LRU des réponses O*NET.
+    Borné en nombre d'entrées et en octets (taille du corps HTTP).
+    Les réponses d'erreur ({"error": ...}) ne sont jamais mises en cache.
+    Avec stale_ttl > 0 (stale-while-revalidate), une entrée périmée reste servie
+    pendant stale_ttl secondes, le temps d'être rafraîchie en arrière-plan.
+    """
+
+    # TTL par défaut par catégorie d'endpoint (secondes)
+    DEFAULT_TTLS = {"search": 3600.0}
+
+    def __init__(self, default_ttl: float = 86400.0, max_entries: int = 2048,
+                 max_bytes: int = 64 * 1024 * 1024, ttls: Optional[Dict[str, float]] = None,
+                 stale_ttl: float = 0.0):
+        self.default_ttl = default_ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttls = dict(self.DEFAULT_TTLS)
+        self.ttls.update(ttls or {})
+
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self.total_bytes = 0
+
+        # Compteurs
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @classmethod
+    def from_env(cls) -> "ResponseCache":
+        """
+        Construit le cache à partir du .env :
+        ONET_CACHE_TTL, ONET_CACHE_MAX_ENTRIES, ONET_CACHE_MAX_BYTES, ONET_CACHE_STALE_TTL
+        et ONET_CACHE_TTL_<CATEGORIE> (ex: ONET_CACHE_TTL_SEARCH, ONET_CACHE_TTL_TASKS).
+        """
+        cache = cls(
+            default_ttl=env_float("ONET_CACHE_TTL", 86400.0),
+            max_entries=env_int("ONET_CACHE_MAX_ENTRIES", 2048),
+            max_bytes=env_int("ONET_CACHE_MAX_BYTES", 64 * 1024 * 1024),
+            stale_ttl=env_float("ONET_CACHE_STALE_TTL", 0.0)
+        )
+        for kind in ("search", "summary", "tasks", "technology_skills", "skills", "knowledge",
+                     "work_activities", "education", "detailed_work_activities", "job_zone",
+                     "work_context", "abilities"):
+            default = cache.ttls.get(kind, cache.default_ttl)
+            cache.ttls[kind] = env_float(f"ONET_CACHE_TTL_{kind.upper()}", default)
+        return cache
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    @staticmethod
+    def make_key(endpoint: str, params: Optional[Dict] = None) -> str:
+        """Clé = endpoint + paramètres normalisés (triés)."""
+        endpoint = "/" + endpoint.strip("/")
+        if not params:
+            return endpoint
+        normalized = "&".join(
+            f"{k}={_normalize_value(k, v)}" for k, v in sorted(params.items()) if v is not None
+        )
+        return f"{endpoint}?{normalized}"
+
+    def ttl_for(self, endpoint: str) -> float:
+        return self.ttls.get(endpoint_kind(endpoint), self.default_ttl)
+
+    def lookup(self, key: str) -> Tuple[Optional[Any], bool]:
+        """Retourne (valeur, périmée). Valeur None = absente ou expirée."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None, False
+
+        now = time.monotonic()
+        if entry.expires_at <= now:
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None, False
+
+        # LRU : l'entrée devient la plus récente
+        self._entries.move_to_end(key)
+        if entry.fresh_until <= now:
+            self.stale_hits += 1
+            return entry.value, True
+
+        self.hits += 1
+        return entry.value, False
+
+    def set(self, key: str, endpoint: str, value: Any, size: int) -> None:
+        # Réponse brute (dict) ou modèle immuable (app/models.py) ; les erreurs ne sont jamais cachées
+        if not self.enabled or (isinstance(value, dict) and "error" in value):
+            return
+
+        ttl = self.ttl_for(endpoint)
+        if ttl <= 0 or size > self.max_bytes:
+            return
+
+        if key in self._entries:
+            self._remove(key)
+
+        fresh_until = time.monotonic() + ttl
+        self._entries[key] = CacheEntry(value, size, fresh_until, fresh_until + max(0.0, self.stale_ttl))
+        self.total_bytes += size
+
+        # Éviction LRU jusqu'à respecter les deux bornes
+        while len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self.total_bytes -= entry.size
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.total_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.total_bytes,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_ratio": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0
+        }
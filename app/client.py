@@ -1,13 +1,54 @@
 import httpx
 import asyncio
-from typing import Dict
+import importlib.util
+import logging
+import time
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
 import os
 
+from .cache import ResponseCache, endpoint_kind
+from .config import env_bool, env_float, env_int, env_str
+from .disk_cache import DiskCache
+from .latency import LatencyTracker
+from .metrics import Counter, Gauge, Histogram
+from .models import loads, parse_section
+from .ratelimit import TokenBucket, backoff_delay, parse_retry_after
+from .reverse_index import ReverseIndex
+from .search_index import SearchIndex
+from .sections import LIST_KEYS, SECTION_ENDPOINTS, SECTIONS, normalize_sections, page_windows, section_endpoint
+from .similarity import SimilarityIndex
+from .singleflight import SingleFlight
+from .tracing import span
+
+logger = logging.getLogger("onet-server")
+
+# Métriques amont (exposées sur /metrics)
+UPSTREAM_LATENCY = Histogram("onet_upstream_request_seconds",
+                             "Latence des requêtes vers l'API O*NET", ["endpoint"])
+UPSTREAM_RESPONSES = Counter("onet_upstream_responses_total",
+                             "Réponses de l'API O*NET par statut HTTP (error = erreur réseau)",
+                             ["endpoint", "status"])
+UPSTREAM_RETRIES = Counter("onet_upstream_retries_total", "Nouvelles tentatives vers l'API O*NET", ["endpoint"])
+UPSTREAM_INFLIGHT = Gauge("onet_upstream_inflight", "Requêtes O*NET en cours")
+UPSTREAM_HEDGED = Counter("onet_upstream_hedged_total", "Requêtes O*NET doublées (hedging)", ["endpoint"])
+SECTIONS_LATE = Counter("onet_sections_late_total", "Sections marquées indisponibles (délai dépassé)", ["section"])
+
+# Erreur des sections non reçues à temps (rendue comme « indisponible » dans le rapport)
+TIMEOUT_ERROR = "Timeout"
+
+
+def late_section(timeout: float) -> Dict:
+    return {"error": TIMEOUT_ERROR, "detail": f"Section non reçue dans le délai imparti ({timeout:g}s)"}
+
 
 class OnetClient:
     BASE_URL = "https://api-v2.onetcenter.org"
 
-    def __init__(self):
+    # Statuts transitoires : on retente (429 = limitation de débit O*NET)
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+    def __init__(self, cache: Optional[ResponseCache] = None, search_index: Optional[SearchIndex] = None,
+                 similarity_index: Optional[SimilarityIndex] = None, reverse_index: Optional[ReverseIndex] = None):
         # Récupération des crédentiels
         self.api_key = os.getenv("ONET_API_KEY")
         if not self.api_key:
@@ -20,20 +61,238 @@ class OnetClient:
             "User-Agent": "MCP-Agent/1.0" # identifier le client (optionnel)
         }
 
-    async def _get(self, client: httpx.AsyncClient, endpoint: str, params: Dict = None) -> Dict:
-        """Méthode générique pour les appels API avec gestion d'erreurs."""
+        # URL de l'API (surchargée pour les benchmarks contre un faux serveur local)
+        self.base_url = env_str("ONET_BASE_URL", self.BASE_URL)
+
+        # Pool de connexions partagé (keep-alive) : réglable via .env
+        self.limits = httpx.Limits(
+            max_connections=env_int("ONET_HTTP_MAX_CONNECTIONS", 20),
+            max_keepalive_connections=env_int("ONET_HTTP_MAX_KEEPALIVE", 20),
+            keepalive_expiry=env_float("ONET_HTTP_KEEPALIVE_EXPIRY", 60.0)
+        )
+        self.timeout = env_float("ONET_HTTP_TIMEOUT", 30.0) # Timeout augmenté (beaucoup de requêtes)
+        self.http2 = env_bool("ONET_HTTP2", False)
+        if self.http2 and importlib.util.find_spec("h2") is None:
+            logger.warning("ONET_HTTP2 activé mais le paquet 'h2' est absent : repli sur HTTP/1.1")
+            self.http2 = False
+
+        # Créé à la première requête (dans la boucle asyncio du serveur)
+        self._http: Optional[httpx.AsyncClient] = None
+
+        # Cache mémoire TTL + LRU des réponses (les données O*NET changent rarement)
+        self.cache = cache if cache is not None else ResponseCache.from_env()
+
+        # Cache disque persistant optionnel des réponses brutes (redémarrages, workers d'un même hôte)
+        self.disk_cache = DiskCache.from_env()
+
+        # Index de recherche local optionnel (évite un aller-retour réseau par mot-clé)
+        self.search_index = search_index
+        self.search_limit = env_int("ONET_SEARCH_LIMIT", 5)
+
+        # Déduplication des requêtes identiques en vol (plusieurs sessions, même SOC)
+        self.inflight = SingleFlight()
+
+        # Rafraîchissements stale-while-revalidate en cours (références conservées)
+        self._background = set()
+        self.background_refreshes = 0
+
+        # Plafond global d'appels O*NET simultanés, partagé par toutes les sessions
+        self.max_concurrency = env_int("ONET_MAX_CONCURRENCY", 10)
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        # Débit global (token bucket) + retries avec backoff exponentiel et Retry-After.
+        # Avec plusieurs workers, le quota O*NET est réparti entre les processus.
+        workers = max(1, env_int("ONET_WORKERS", 1))
+        burst = env_int("ONET_RATE_BURST", 0)
+        self.rate_limiter = TokenBucket(
+            rate=env_float("ONET_RATE_LIMIT", 10.0) / workers,
+            burst=max(1, burst // workers) if burst else None
+        )
+        self.max_retries = env_int("ONET_MAX_RETRIES", 3)
+        self.retry_base_delay = env_float("ONET_RETRY_BASE_DELAY", 0.5)
+        self.retry_max_delay = env_float("ONET_RETRY_MAX_DELAY", 30.0)
+        self.retries = 0
+
+        # Hedging : une requête plus lente que le percentile ONET_HEDGE_PERCENTILE de son endpoint
+        # est doublée (si quota et concurrence le permettent) ; la première réponse gagne
+        self.hedge_percentile = env_float("ONET_HEDGE_PERCENTILE", 0.0)
+        self.hedge_min_delay = env_float("ONET_HEDGE_MIN_DELAY", 0.05)
+        self.latency = LatencyTracker(min_samples=env_int("ONET_HEDGE_MIN_SAMPLES", 20))
+        self.hedged = 0
+
+        # Échéance du rapport et budget par section : au-delà, la section est marquée indisponible,
+        # la requête continue en arrière-plan et alimente le cache
+        self.report_deadline = env_float("ONET_REPORT_DEADLINE", 0.0)
+        default_budget = env_float("ONET_SECTION_BUDGET", 0.0)
+        self.section_budgets = {section: env_float(f"ONET_SECTION_BUDGET_{section.upper()}", default_budget)
+                                for section in SECTIONS}
+        self.late_sections = 0
+
+        # Pages supplémentaires demandées en mode complet
+        self.pages_fetched = 0
+
+        # Écouteurs appelés avec (code SOC, sections décodées) après chaque rapport
+        # (ex: index de similarité alimenté au fil des appels)
+        self.listeners: List[Callable[[str, Dict], None]] = []
+
+        # Index des métiers proches et index inversé (technologies, compétences...),
+        # complétés par chaque rapport récupéré
+        self.similarity_index = similarity_index
+        self.reverse_index = reverse_index
+        for index in (similarity_index, reverse_index):
+            if index is not None:
+                self.listeners.append(index.on_occupation)
+
+    def _notify(self, soc_code: str, data: Dict) -> None:
+        for listener in self.listeners:
+            try:
+                listener(soc_code.strip(), data)
+            except Exception as e:
+                logger.warning(f"Écouteur {listener!r} en échec pour {soc_code} : {e}")
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        """Client HTTP long-vivant, réutilisé par tous les appels (TCP/TLS conservés)."""
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self.headers,
+                limits=self.limits,
+                timeout=self.timeout,
+                http2=self.http2
+            )
+        return self._http
+
+    async def aclose(self) -> None:
+        """Ferme proprement le pool de connexions (appelé à l'arrêt du serveur)."""
+        for task in list(self._background):
+            task.cancel()
+        if self._http is not None and not self._http.is_closed:
+            await self._http.aclose()
+        self._http = None
+        if self.disk_cache is not None:
+            self.disk_cache.close()
+
+    def stats(self) -> Dict:
+        return {"backend": "api", "cache": self.cache.stats(), "inflight_shared": self.inflight.shared,
+                "retries": self.retries, "background_refreshes": self.background_refreshes,
+                "hedged": self.hedged, "late_sections": self.late_sections, "pages_fetched": self.pages_fetched,
+                "disk_cache": self.disk_cache.stats() if self.disk_cache is not None else None}
+
+    async def _get(self, endpoint: str, params: Dict = None, section: Optional[str] = None,
+                   complete: bool = False) -> Dict:
+        """
+        Méthode générique pour les appels API avec gestion d'erreurs.
+        Avec `section`, la réponse est décodée en modèle immuable (app/models.py), mis en cache tel quel.
+        Avec `complete` (section paginée), toutes les pages sont récupérées et fusionnées (voir _fetch_complete).
+        """
 
         if not endpoint.startswith("/"):
             endpoint = f"/{endpoint}"
 
+        with span(f"GET {endpoint_kind(endpoint)}", endpoint=endpoint) as current:
+            if complete:
+                # Clé distincte de la première page seule
+                key = self.cache.make_key(endpoint, {**(params or {}), "complete": 1})
+                fetch = lambda: self._fetch_complete(endpoint, params, key, section)
+            else:
+                key = self.cache.make_key(endpoint, params)
+                fetch = lambda: self._fetch(endpoint, params, key, section)
+
+            cached, stale = self.cache.lookup(key)
+            if cached is not None:
+                current.set_attribute("cache", "stale" if stale else "hit")
+                if stale:
+                    # Stale-while-revalidate : réponse immédiate, rafraîchissement en arrière-plan
+                    self._refresh_in_background(key, fetch)
+                return cached
+
+            current.set_attribute("cache", "miss")
+            return await self.inflight.do(("get", key), fetch)
+
+    def _refresh_in_background(self, key: str, fetch: Callable[[], Awaitable[Dict]]) -> None:
+        # Dédupliqué par SingleFlight : un seul rafraîchissement par clé en vol
+        task = asyncio.ensure_future(self.inflight.do(("get", key), fetch))
+        self._keep_in_background(task)
+        self.background_refreshes += 1
+
+    def _keep_in_background(self, task: asyncio.Future) -> None:
+        # Référence conservée jusqu'à la fin de la tâche (annulée par aclose)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _fetch(self, endpoint: str, params: Optional[Dict], key: str, section: Optional[str] = None) -> Dict:
+        """Appel HTTP réel (un seul par clé en vol, voir _get)."""
+        data, size = await self._fetch_json(endpoint, params)
+        if "error" in data:
+            return data
+        if section is not None:
+            data = parse_section(section, data)
+        # Taille du JSON brut : majorant de la taille du modèle en mémoire
+        self.cache.set(key, endpoint, data, size)
+        return data
+
+    async def _fetch_complete(self, endpoint: str, params: Dict, key: str, section: str) -> Dict:
+        """
+        Liste complète d'une section paginée : la première page donne le total,
+        les pages restantes sont demandées en parallèle (sous le débit et le plafond de
+        concurrence globaux), puis fusionnées avant le décodage en modèle.
+        """
+        first, size = await self._fetch_json(endpoint, params)
+        if "error" in first:
+            return first
+
+        list_key = LIST_KEYS[section]
+        items = list(first.get(list_key) or [])
+        total = first.get("total") or 0
+        windows = page_windows(params, total) if len(items) < total else []
+        if windows:
+            pages = await asyncio.gather(*(self._fetch_json(endpoint, window) for window in windows))
+            for page, page_size in pages:
+                if "error" in page:
+                    # Liste incomplète : erreur plutôt qu'un résultat tronqué (et rien en cache)
+                    return page
+                items.extend(page.get(list_key) or [])
+                size += page_size
+            self.pages_fetched += len(windows)
+
+        merged = {**first, list_key: items, "start": 1, "end": len(items)}
+        data = parse_section(section, merged)
+        self.cache.set(key, endpoint, data, size)
+        return data
+
+    async def _fetch_json(self, endpoint: str, params: Optional[Dict]) -> Tuple[Dict, int]:
+        """
+        Réponse JSON brute et sa taille, ou dict d'erreur (taille 0).
+        Avec le cache disque : une entrée fraîche évite l'appel, une entrée expirée est
+        revalidée par requête conditionnelle (If-None-Match / If-Modified-Since).
+        """
+        disk = self.disk_cache
+        stored = None
+        headers = None
+        if disk is not None:
+            key = self.cache.make_key(endpoint, params)
+            with span("disk_cache.get") as current:
+                stored = await asyncio.to_thread(disk.get, key)
+                current.set_attribute("cache", "miss" if stored is None else "hit" if stored.fresh else "stale")
+            if stored is not None:
+                if stored.fresh:
+                    return loads(stored.body), len(stored.body)
+                headers = {name: value for name, value in (("If-None-Match", stored.etag),
+                                                           ("If-Modified-Since", stored.last_modified)) if value}
         try:
-            response = await client.get(
-                f"{self.BASE_URL}{endpoint}",
-                headers=self.headers,
-                params=params,
-                timeout=30.0 # Timeout augmenté (beaucoup de requêtes)
-            )
-            return response.json()
+            response = await self._request(endpoint, params, headers or None)
+            if response.status_code == 304 and stored is not None:
+                # Inchangé côté O*NET : le corps stocké est réutilisé sans être retéléchargé
+                await asyncio.to_thread(disk.refresh, key, self.cache.ttl_for(endpoint),
+                                        response.headers.get("ETag"), response.headers.get("Last-Modified"))
+                return loads(stored.body), len(stored.body)
+            response.raise_for_status()
+            data = loads(response.content)
+            if disk is not None:
+                await asyncio.to_thread(disk.put, key, response.content, response.headers.get("ETag"),
+                                        response.headers.get("Last-Modified"), self.cache.ttl_for(endpoint))
+            return data, len(response.content)
 
         except httpx.HTTPStatusError as e:
             error_details = {
@@ -41,63 +300,203 @@ class OnetClient:
                 "url": str(e.request.url),
                 "detail": e.response.text
             }
-            return error_details
+            return error_details, 0
 
         except Exception as e:
-            return {"error": "Connection Error", "detail": str(e)}
+            return {"error": "Connection Error", "detail": str(e)}, 0
+
+    async def _request(self, endpoint: str, params: Optional[Dict], headers: Optional[Dict] = None) -> httpx.Response:
+        """
+        Requête soumise au débit global et au plafond de concurrence,
+        retentée sur 429/5xx et erreurs réseau (backoff exponentiel + jitter, Retry-After respecté).
+        """
+        attempt = 0
+        while True:
+            with span("rate_limit.wait"):
+                await self.rate_limiter.acquire()
+            try:
+                response = await self._send_hedged(endpoint, params, headers)
+            except httpx.TransportError:
+                if attempt >= self.max_retries:
+                    raise
+                delay = backoff_delay(attempt, self.retry_base_delay, self.retry_max_delay)
+            else:
+                if response.status_code not in self.RETRY_STATUSES or attempt >= self.max_retries:
+                    return response
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                delay = backoff_delay(attempt, self.retry_base_delay, self.retry_max_delay, retry_after)
+                if response.status_code == 429:
+                    # Toutes les sessions ralentissent, pas seulement cette requête
+                    self.rate_limiter.pause(delay)
+                logger.warning(f"O*NET HTTP {response.status_code} sur {endpoint}, "
+                               f"nouvelle tentative dans {delay:.2f}s")
+
+            attempt += 1
+            self.retries += 1
+            UPSTREAM_RETRIES.inc(endpoint_kind(endpoint))
+            await asyncio.sleep(delay)
 
-    async def search_occupation(self, keyword: str) -> Dict:
-        """Recherche par keyword"""
-        async with httpx.AsyncClient() as client:
-            return await self._get(client, "/online/search", {"keyword": keyword, "end": 5})
+    async def _attempt(self, endpoint: str, params: Optional[Dict], headers: Optional[Dict] = None) -> httpx.Response:
+        async with self.semaphore:
+            return await self._send(endpoint, params, headers)
 
-    async def get_full_occupation_details(self, soc_code: str) -> Dict:
+    async def _send_hedged(self, endpoint: str, params: Optional[Dict],
+                           headers: Optional[Dict] = None) -> httpx.Response:
+        """
+        Requête doublée si elle dépasse le percentile de latence récent de son endpoint,
+        uniquement si un jeton et une place de concurrence sont libres : la première réponse gagne.
+        """
+        kind = endpoint_kind(endpoint)
+        threshold = self.latency.percentile(kind, self.hedge_percentile) if self.hedge_percentile > 0 else None
+        if threshold is None:
+            return await self._attempt(endpoint, params, headers)
+
+        attempts = [asyncio.ensure_future(self._attempt(endpoint, params, headers))]
+        try:
+            done, _ = await asyncio.wait(attempts, timeout=max(threshold, self.hedge_min_delay))
+            if not done and not self.semaphore.locked() and self.rate_limiter.try_acquire():
+                self.hedged += 1
+                UPSTREAM_HEDGED.inc(kind)
+                logger.info(f"Requête O*NET lente sur {endpoint} (> {threshold:.2f}s) : doublée")
+                attempts.append(asyncio.ensure_future(self._attempt(endpoint, params, headers)))
+
+            pending = set(attempts)
+            while True:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in attempts:
+                    if task in done and task.exception() is None:
+                        return task.result()
+                if not pending:
+                    # Toutes les tentatives ont échoué : erreur de la première
+                    return attempts[0].result()
+        finally:
+            for task in attempts:
+                task.cancel()
+
+    async def _send(self, endpoint: str, params: Optional[Dict], headers: Optional[Dict] = None) -> httpx.Response:
+        """Un aller-retour HTTP, mesuré (latence, statut, requêtes en vol)."""
+        kind = endpoint_kind(endpoint)
+        UPSTREAM_INFLIGHT.inc()
+        started = time.perf_counter()
+        with span("http.get") as current:
+            try:
+                response = await self.http.get(endpoint, params=params, headers=headers)
+            except httpx.TransportError:
+                UPSTREAM_RESPONSES.inc(kind, "error")
+                UPSTREAM_LATENCY.observe(time.perf_counter() - started, kind)
+                raise
+            finally:
+                UPSTREAM_INFLIGHT.dec()
+            current.set_attribute("status", response.status_code)
+        elapsed = time.perf_counter() - started
+        UPSTREAM_LATENCY.observe(elapsed, kind)
+        UPSTREAM_RESPONSES.inc(kind, str(response.status_code))
+        if response.status_code not in self.RETRY_STATUSES:
+            self.latency.record(kind, elapsed)
+        return response
+
+    async def search_occupation(self, keyword: str, limit: Optional[int] = None) -> Dict:
+        """Recherche par keyword (index local si disponible, sinon API)"""
+        limit = limit or self.search_limit
+        if self.search_index is not None:
+            return self.search_index.search_response(keyword, limit)
+        return await self._get("/online/search", {"keyword": keyword, "end": limit})
+
+    async def get_full_occupation_details(self, soc_code: str, sections: Optional[Iterable[str]] = None,
+                                          complete: bool = False) -> Dict:
         """
         Agrégateur : Effectue plusieurs appels en parallèle pour construire
         un profil complet (Tasks, Skills, Tech, etc.)
+        `sections` limite les appels aux sections demandées (défaut : toutes).
+        `complete` récupère toutes les pages des listes au lieu de la première fenêtre.
+        Les appelants concurrents pour un même code SOC partagent la même agrégation.
         """
-        async with httpx.AsyncClient() as client:
-            # Paramètres standards de pagination
-            p= {"start": 1, "end": 20}
-
-            # Pour Detailed Work Activities
-            p_dwa = {"start": 1, "end": 35}
-
-            results = await asyncio.gather(
-                # 0. Infos de base (Including sample_of_reported_titles)
-                self._get(client, f"online/occupations/{soc_code}"),
-                # 1. Tâches
-                self._get(client, f"online/occupations/{soc_code}/details/tasks", p),
-                # 2. Technologies (hot technologies, in demand, pourcentage)
-                self._get(client, f"online/occupations/{soc_code}/details/technology_skills", p),
-                # 3. Skills (Compétences)
-                self._get(client, f"online/occupations/{soc_code}/details/skills", p),
-                # 4. Knowledge (Connaissance / Savoir)
-                self._get(client, f"online/occupations/{soc_code}/details/knowledge", p),
-                # 5. Work Activities (Activités professionnelles)
-                self._get(client, f"online/occupations/{soc_code}/details/work_activities", p),
-                # 6. Education
-                self._get(client, f"online/occupations/{soc_code}/details/education"),
-                # 7. Detailed Work Activities (Activités pro détaillées)
-                self._get(client, f"online/occupations/{soc_code}/details/detailed_work_activities", p_dwa),
-                # 8. Job Zone (Zone d'emploi)
-                self._get(client, f"online/occupations/{soc_code}/details/job_zone"),
-                # 9. Work Context (Contexte professionnel)
-                self._get(client, f"online/occupations/{soc_code}/details/work_context", p),
-                # 10. Abilities (Capacités)
-                self._get(client, f"online/occupations/{soc_code}/details/abilities", p)
-            )
+        sections = normalize_sections(sections)
+        return await self.inflight.do(
+            ("details", soc_code.strip(), sections, complete),
+            lambda: self._fetch_full_occupation_details(soc_code, sections, complete)
+        )
+
+    async def _get_section(self, soc_code: str, section: str, complete: bool = False):
+        return await self._get(section_endpoint(soc_code, section), SECTION_ENDPOINTS[section][1], section,
+                               complete=complete and section in LIST_KEYS)
+
+    def section_timeout(self, section: str) -> Optional[float]:
+        """Délai accordé à une section (budget propre et échéance du rapport), None = illimité."""
+        limits = [t for t in (self.report_deadline, self.section_budgets.get(section, 0.0)) if t > 0]
+        return min(limits) if limits else None
+
+    def _section_late(self, section: str, task: asyncio.Future, timeout: float) -> Dict:
+        # La requête continue : sa réponse alimentera le cache pour le prochain appel
+        self._keep_in_background(task)
+        self.late_sections += 1
+        SECTIONS_LATE.inc(section)
+        logger.warning(f"Section {section} non reçue en {timeout:g}s : marquée indisponible")
+        return late_section(timeout)
+
+    async def _fetch_full_occupation_details(self, soc_code: str, sections: Tuple[str, ...],
+                                             complete: bool = False) -> Dict:
+        timeouts = {section: self.section_timeout(section) for section in sections}
+        if not any(timeouts.values()):
+            results = await asyncio.gather(*(
+                self._get_section(soc_code, section, complete) for section in sections
+            ))
+            result = dict(zip(sections, results))
+            self._notify(soc_code, result)
+            return result
 
-        return {
-            "summary": results[0],
-            "tasks": results[1],
-            "technology_skills": results[2],
-            "skills": results[3],
-            "knowledge": results[4],
-            "work_activities": results[5],
-            "education": results[6],
-            "detailed_work_activities": results[7],
-            "job_zone": results[8],
-            "work_context": results[9],
-            "abilities": results[10]
-        }
\ No newline at end of file
+        tasks = {section: asyncio.ensure_future(self._get_section(soc_code, section, complete))
+                 for section in sections}
+
+        async def within_budget(section: str) -> Dict:
+            try:
+                return await asyncio.wait_for(asyncio.shield(tasks[section]), timeouts[section])
+            except asyncio.TimeoutError:
+                return self._section_late(section, tasks[section], timeouts[section])
+
+        try:
+            results = await asyncio.gather(*(within_budget(section) for section in sections))
+        except BaseException:
+            for task in tasks.values():
+                if task not in self._background:
+                    task.cancel()
+            raise
+        result = dict(zip(sections, results))
+        self._notify(soc_code, result)
+        return result
+
+    async def iter_occupation_sections(self, soc_code: str, sections: Optional[Iterable[str]] = None,
+                                       complete: bool = False) -> AsyncIterator[Tuple[str, Dict]]:
+        """
+        Mode streaming : produit (section, données) dans l'ordre d'arrivée des réponses,
+        au lieu d'attendre l'endpoint le plus lent.
+        """
+        sections = normalize_sections(sections)
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        pending = {asyncio.ensure_future(self._get_section(soc_code, section, complete)): section
+                   for section in sections}
+        expiries = {section: started + timeout for section in sections
+                    if (timeout := self.section_timeout(section))}
+        received = {}
+        try:
+            while pending:
+                waiting = [expiries[s] for s in pending.values() if s in expiries]
+                timeout = max(0.0, min(waiting) - loop.time()) if waiting else None
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    section = pending.pop(task)
+                    received[section] = task.result()
+                    yield section, received[section]
+                # Sections hors délai : marquées indisponibles, la requête continue en arrière-plan
+                now = loop.time()
+                for task, section in list(pending.items()):
+                    if section in expiries and expiries[section] <= now and not task.done():
+                        del pending[task]
+                        yield section, self._section_late(section, task, expiries[section] - started)
+            self._notify(soc_code, received)
+        finally:
+            # Consommateur parti (annulation) : on n'attend plus les sections restantes
+            for task in pending:
+                task.cancel()
@@ -0,0 +1,33 @@
+import os
+
+
+# HELPERS DE CONFIGURATION (variables d'environnement / .env)
+
+def env_str(name: str, default: str = "") -> str:
+    """Lit une variable texte (espaces retirés)."""
+    value = os.getenv(name)
+    return value.strip() if value is not None and value.strip() else default
+
+
+def env_int(name: str, default: int) -> int:
+    """Lit une variable entière, retombe sur la valeur par défaut si invalide."""
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def env_float(name: str, default: float) -> float:
+    """Lit une variable décimale, retombe sur la valeur par défaut si invalide."""
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def env_bool(name: str, default: bool = False) -> bool:
+    """Lit un booléen (1/true/yes/on)."""
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
@@ -0,0 +1,153 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, NamedTuple, Optional
+
+from .config import env_int, env_str
+
+logger = logging.getLogger("onet-server")
+
+
+class DiskEntry(NamedTuple):
+    body: bytes
+    etag: Optional[str]
+    last_modified: Optional[str]
+    # Horodatage (time.time) : au-delà, l'entrée doit être revalidée
+    fresh_until: float
+
+    @property
+    def fresh(self) -> bool:
+        return self.fresh_until > time.time()
+
+
+class DiskCache:
+    """
+    Cache disque persistant des réponses O*NET brutes (SQLite en mode WAL).
+
+    Survit aux redémarrages et se partage entre les workers d'un même hôte.
+    Borné en octets : les entrées les moins récemment lues sont évincées.
+    Une entrée expirée est conservée avec ses validateurs (ETag, Last-Modified)
+    pour être revalidée par requête conditionnelle (304 = corps réutilisé).
+    Méthodes bloquantes : à appeler via asyncio.to_thread. Une erreur SQLite
+    est journalisée et traitée comme une absence, jamais propagée à la requête.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        # Autocommit ; une connexion par processus, sérialisée entre les threads
+        self.conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self.lock = threading.Lock()
+        with self.lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, body BLOB NOT NULL, etag TEXT, last_modified TEXT, "
+                "fresh_until REAL NOT NULL, accessed REAL NOT NULL, size INTEGER NOT NULL)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+            self.total_bytes = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+        # Compteurs
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.evictions = 0
+        self.errors = 0
+
+    @classmethod
+    def from_env(cls) -> Optional["DiskCache"]:
+        """ONET_DISK_CACHE (fichier SQLite, vide = désactivé) et ONET_DISK_CACHE_MAX_BYTES."""
+        path = env_str("ONET_DISK_CACHE")
+        if not path:
+            return None
+        try:
+            cache = cls(path, env_int("ONET_DISK_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+        except (OSError, sqlite3.Error) as e:
+            raise ValueError(f"Cache disque inutilisable ({path}) : {e}")
+        logger.info(f"Cache disque : {path} ({cache.total_bytes} octets au démarrage)")
+        return cache
+
+    def _failed(self, action: str, e: sqlite3.Error) -> None:
+        self.errors += 1
+        logger.warning(f"Cache disque ({self.path}) : {action} impossible : {e}")
+
+    def get(self, key: str) -> Optional[DiskEntry]:
+        try:
+            with self.lock:
+                row = self.conn.execute(
+                    "SELECT body, etag, last_modified, fresh_until FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    self.conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (time.time(), key))
+        except sqlite3.Error as e:
+            self._failed("lecture", e)
+            return None
+        entry = DiskEntry(*row) if row is not None else None
+        # Miss = pas d'entrée fraîche (une entrée expirée peut encore être revalidée)
+        if entry is not None and entry.fresh:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return entry
+
+    def put(self, key: str, body: bytes, etag: Optional[str], last_modified: Optional[str], ttl: float) -> None:
+        size = len(body)
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        try:
+            with self.lock:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, body, etag, last_modified, fresh_until, accessed, size) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, body, etag, last_modified, now + ttl, now, size)
+                )
+                self._evict()
+        except sqlite3.Error as e:
+            self._failed("écriture", e)
+
+    def refresh(self, key: str, ttl: float, etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        """Réponse 304 : l'entrée redevient fraîche (validateurs mis à jour s'ils sont renvoyés)."""
+        self.revalidated += 1
+        now = time.time()
+        try:
+            with self.lock:
+                self.conn.execute(
+                    "UPDATE responses SET fresh_until = ?, accessed = ?, "
+                    "etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified) WHERE key = ?",
+                    (now + ttl, now, etag, last_modified, key)
+                )
+        except sqlite3.Error as e:
+            self._failed("revalidation", e)
+
+    def _evict(self) -> None:
+        # Total relu à chaque écriture : les autres workers écrivent dans le même fichier
+        self.total_bytes = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if self.total_bytes <= self.max_bytes:
+            return
+        # Marge de 10 % pour ne pas évincer à chaque écriture suivante
+        excess = self.total_bytes - int(self.max_bytes * 0.9)
+        victims = []
+        for key, size in self.conn.execute("SELECT key, size FROM responses ORDER BY accessed"):
+            victims.append((key,))
+            excess -= size
+            self.total_bytes -= size
+            if excess <= 0:
+                break
+        self.conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+        self.evictions += len(victims)
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
+
+    def stats(self) -> Dict:
+        return {"path": self.path, "bytes": self.total_bytes, "hits": self.hits, "revalidated": self.revalidated,
+                "misses": self.misses, "evictions": self.evictions, "errors": self.errors}
@@ -0,0 +1,19 @@
+from contextlib import contextmanager
+from typing import Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows : pas de verrou entre workers
+    fcntl = None
+
+
+@contextmanager
+def locked(path: str) -> Iterator[None]:
+    """
+    Verrou exclusif entre processus (fichier `<path>.lock`) autour d'une relecture-fusion-écriture
+    de `path` : les workers qui sauvegardent en même temps passent l'un après l'autre.
+    """
+    with open(f"{path}.lock", "w") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
@@ -0,0 +1,76 @@
+"""
+Ingestion de la base O*NET (release texte) pour le mode hors ligne.
+
+Usage :
+    python -m app.ingest chemin/vers/db_29_0_text [--db data/onet.sqlite] [--version 29.0]
+                         [--search-index data/search_index.json]
+                         [--similarity-index data/similarity.npy] [--reverse-index data/reverse_index.json]
+"""
+import argparse
+import logging
+import sqlite3
+
+from dotenv import load_dotenv
+
+from .config import env_str
+from .offline import ingest_release
+from .reverse_index import ReverseIndex
+from .search_index import SearchIndex
+from .similarity import SimilarityIndex
+
+logger = logging.getLogger("onet-server")
+
+
+def main() -> None:
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Ingère une release O*NET (texte) dans SQLite.")
+    parser.add_argument("release_dir", help="Dossier de la release O*NET décompressée (fichiers .txt)")
+    parser.add_argument("--db", default=env_str("ONET_OFFLINE_DB", "data/onet.sqlite"),
+                        help="Fichier SQLite de sortie (défaut : ONET_OFFLINE_DB)")
+    parser.add_argument("--version", default=None,
+                        help="Version de la release (défaut : nom du dossier)")
+    parser.add_argument("--search-index", default=None,
+                        help="Écrit aussi l'index de recherche pré-construit (à charger via ONET_SEARCH_INDEX)")
+    parser.add_argument("--similarity-index", default=None,
+                        help="Écrit aussi l'index des métiers proches (.npy + .json, "
+                             "à charger via ONET_SIMILARITY_INDEX)")
+    parser.add_argument("--reverse-index", default=None,
+                        help="Écrit aussi l'index inversé technologies / compétences / activités "
+                             "(à charger via ONET_REVERSE_INDEX)")
+    args = parser.parse_args()
+
+    meta = ingest_release(args.release_dir, args.db, args.version)
+    logger.info(f"Base locale prête : {args.db} (release {meta['release']}, "
+                f"{meta['occupations']} métiers)")
+
+    if args.search_index:
+        conn = sqlite3.connect(args.db)
+        try:
+            SearchIndex.from_offline(conn).save(args.search_index)
+        finally:
+            conn.close()
+        logger.info(f"Index de recherche écrit : {args.search_index}")
+
+    if args.similarity_index:
+        conn = sqlite3.connect(args.db)
+        try:
+            index = SimilarityIndex.from_offline(conn)
+            index.save(args.similarity_index, merge=False)
+        finally:
+            conn.close()
+        logger.info(f"Index de similarité écrit : {args.similarity_index} "
+                    f"({len(index)} métiers, {len(index.dims)} dimensions)")
+
+    if args.reverse_index:
+        conn = sqlite3.connect(args.db)
+        try:
+            ReverseIndex.from_offline(conn).save(args.reverse_index, merge=False)
+        finally:
+            conn.close()
+        logger.info(f"Index inversé écrit : {args.reverse_index}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+from collections import deque
+from typing import Deque, Dict, Optional
+
+
+class LatencyTracker:
+    """
+    Latences récentes par endpoint (fenêtre glissante) pour estimer un percentile :
+    sert à décider quand doubler (hedger) une requête anormalement lente.
+    """
+
+    def __init__(self, window: int = 256, min_samples: int = 20):
+        self.window = window
+        self.min_samples = min_samples
+        self.samples: Dict[str, Deque[float]] = {}
+
+    def record(self, kind: str, seconds: float) -> None:
+        samples = self.samples.get(kind)
+        if samples is None:
+            samples = self.samples[kind] = deque(maxlen=self.window)
+        samples.append(seconds)
+
+    def percentile(self, kind: str, pct: float) -> Optional[float]:
+        """None tant que l'échantillon est trop petit pour être significatif."""
+        samples = self.samples.get(kind)
+        if not samples or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+        return ordered[index]
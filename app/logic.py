@@ -1,9 +1,19 @@
+import asyncio
+import json
+from functools import partial
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
 from . import formatters
-from .client import OnetClient
+from .budget import check_style, render_budgeted
+from .client import TIMEOUT_ERROR, OnetClient
+from .models import SectionModel, Summary, is_error
+from .sections import normalize_sections
+from .similarity import VECTOR_SECTIONS
+from .tracing import span
 
-async def search_occupation_logic(client: OnetClient, keyword: str) -> str:
+async def search_occupation_logic(client: OnetClient, keyword: str, limit: Optional[int] = None) -> str:
     """Logique de recherche et formatage des résultats."""
-    data = await client.search_occupation(keyword)
+    data = await client.search_occupation(keyword, limit)
 
     # Gestion des erreurs HTTP
     if "error" in data:
@@ -23,63 +33,242 @@ async def search_occupation_logic(client: OnetClient, keyword: str) -> str:
     return result_text
 
 
-async def get_details_logic(client: OnetClient, soc_code: str) -> str:
-    """Logique d'agrégation et de création du rapport complet."""
+async def related_occupations_logic(client: OnetClient, soc_code: str, limit: int = 10) -> str:
+    """
+    Métiers les plus proches (similarité cosinus des scores d'importance).
+    Un code pas encore indexé est d'abord récupéré (sections de scores seulement) ;
+    l'écouteur du client l'ajoute alors à l'index.
+    """
+    clean_code = _clean_code(soc_code)
+    index = client.similarity_index
+    if clean_code not in index:
+        data = await client.get_full_occupation_details(clean_code, VECTOR_SECTIONS)
+        summary = data.get("summary", {})
+        if is_error(summary):
+            return render_error(clean_code, summary)
+
+    related = index.similar(clean_code, limit)
+    if related is None:
+        return f"Aucun score d'importance disponible pour le code '{clean_code}'."
+    if not related:
+        return "Aucun autre métier indexé pour la comparaison."
+
+    title = index.titles.get(clean_code) or clean_code
+    result_text = f"Métiers proches de **{title}** (Code SOC: `{clean_code}`), parmi {len(index)} métiers indexés :\n"
+    for code, related_title, score in related:
+        result_text += f"- **{related_title}** (Code SOC: `{code}`) — similarité {score:.2f}\n"
+
+    result_text += "\nUtilisez le Code SOC pour obtenir les détails."
+    return result_text
+
+
+# Libellés des types de recherche inversée
+_KIND_LABELS = {"technology": "la technologie", "skill": "la compétence",
+                "knowledge": "la connaissance", "activity": "l'activité"}
+
+
+async def find_occupations_logic(client: OnetClient, kind: str, query: str, limit: int = 10,
+                                 rank: str = "importance") -> str:
+    """Recherche inversée : métiers utilisant une technologie, une compétence, une connaissance ou une DWA."""
+    index = client.reverse_index
+    matches = index.lookup(kind, query, limit, rank)
+    if not matches:
+        return f"Aucun métier indexé ({len(index)}) ne correspond à {_KIND_LABELS[kind]} '{query}'."
+
+    result_text = f"Métiers pour {_KIND_LABELS[kind]} '{query}' (parmi {len(index)} métiers indexés) :\n"
+    for match in matches:
+        # Mêmes marqueurs que le rapport : 🔥 hot technology, 📈 in demand
+        term = f"{match.term} {'🔥' if match.hot else ''}{'📈' if match.in_demand else ''}".strip()
+        if kind == "activity":
+            result_text += f"- **{match.title}** (Code SOC: `{match.code}`) — {term}\n"
+        else:
+            label = "Score" if kind == "technology" else "Imp"
+            result_text += f"- **{match.title}** (Code SOC: `{match.code}`) — {term} ({label}: {match.score:g})\n"
+
+    result_text += "\nUtilisez le Code SOC pour obtenir les détails."
+    return result_text
+
+
+# Sections du rapport : (clé de données, titre Markdown, formateur), dans l'ordre d'affichage
+REPORT_SECTIONS = [
+    ("job_zone", "Zone d'Emploi (Job Zone)", formatters.format_job_zone),
+    ("tasks", "1. Tâches Principales", formatters.format_tasks),
+    ("work_activities", "2. Activités Professionnelles Générales (Work Activities)", formatters.format_scored_elements),
+    ("detailed_work_activities", "3. Activités Détaillées (Detailed Work Activities)", formatters.format_dwa),
+    ("technology_skills", "4. Technologies & Outils", partial(formatters.format_technology, limit_per_cat=6)),
+    ("skills", "5. Compétences Transversales (Skills)", formatters.format_scored_elements),
+    ("abilities", "6. Capacités (Abilities)", formatters.format_scored_elements),
+    ("knowledge", "7. Connaissances (Knowledge)", formatters.format_scored_elements),
+    ("work_context", "8. Contexte de Travail (Work Context)", formatters.format_work_context),
+    ("education", "9. Éducation & Diplômes", formatters.format_education),
+]
+_RENDERERS = {key: (heading, formatter) for key, heading, formatter in REPORT_SECTIONS}
+
+# Mode complet : listes affichées sans plafond (paramètre de limite de chaque formateur)
+_COMPLETE_OPTIONS = {
+    "tasks": {"limit": None},
+    "work_activities": {"limit": None},
+    "detailed_work_activities": {"limit": None},
+    "technology_skills": {"limit_per_cat": None},
+    "skills": {"limit": None},
+    "abilities": {"limit": None},
+    "knowledge": {"limit": None},
+    "work_context": {"limit": None},
+}
+
+# Callback du mode streaming : (section, texte formaté, sections reçues, total)
+SectionCallback = Callable[[str, str, int, int], Awaitable[None]]
 
+
+def _clean_code(soc_code: str) -> str:
     # Nettoyage préventif du code
-    clean_code = soc_code.strip().replace("'", "").replace('"', "")
+    return soc_code.strip().replace("'", "").replace('"', "")
 
-    data = await client.get_full_occupation_details(clean_code)
 
-    summary = data.get('summary', {})
-    if "error" in summary:
-        return (f"ERREUR API O*NET pour le code '{clean_code}'\n"
-                f"Détail : {summary.get('detail', summary)}\n")
+def render_error(clean_code: str, summary: Dict, style: str = "markdown") -> str:
+    if style == "json":
+        return json.dumps({"code": clean_code, "error": summary.get("error"), "detail": summary.get("detail")},
+                          ensure_ascii=False, separators=(",", ":"))
+    return (f"ERREUR API O*NET pour le code '{clean_code}'\n"
+            f"Détail : {summary.get('detail', summary)}\n")
 
-    # Construction du rapport
-    title = summary.get('title')
-    desc = summary.get('description')
+
+def render_header(summary: Summary) -> str:
+    """En-tête du rapport : titre, description et titres similaires."""
     # --- EXTRACTION DES TITRES SIMILAIRES ---
-    sample_titles = summary.get('sample_of_reported_titles', [])
+    sample_titles = summary.sample_titles
     sample_titles_str = ", ".join(sample_titles) if sample_titles else "Aucun titre similaire disponible."
 
-    report = f"""
-# FICHE MÉTIER : {title} **Code SOC** : {summary.get('code')}
+    return f"""
+# FICHE MÉTIER : {summary.title} **Code SOC** : {summary.code}
 
 ## 📝 Description
-{desc}
+{summary.description}
 
 ## 📌 Titres Similaires (Reported Titles)
 {sample_titles_str}
+"""
 
-## Zone d'Emploi (Job Zone)
-{formatters.format_job_zone(data.get('job_zone', {}))}
 
-## 1. Tâches Principales
-{formatters.format_tasks(data.get('tasks', {}))}
+def render_section(key: str, data: Union[SectionModel, Dict], complete: bool = False) -> str:
+    """Une section du rapport (titre Markdown + contenu formaté, sans plafond en mode complet)."""
+    heading, formatter = _RENDERERS[key]
+    if isinstance(data, dict) and data.get("error") == TIMEOUT_ERROR:
+        # Section trop lente : le rapport est rendu à temps sans elle
+        return f"\n## {heading}\n⏱️ Section indisponible : {data.get('detail')}\n"
+    with span(f"format {key}"):
+        options = _COMPLETE_OPTIONS.get(key, {}) if complete else {}
+        return f"\n## {heading}\n{formatter(data, **options)}\n"
 
-## 2. Activités Professionnelles Générales (Work Activities)
-{formatters.format_scored_elements(data.get('work_activities', {}))}
 
-## 3. Activités Détaillées (Detailed Work Activities)
-{formatters.format_dwa(data.get('detailed_work_activities', {}))}
+def render_report(clean_code: str, data: Dict, selected: Tuple[str, ...], complete: bool = False,
+                  max_chars: Optional[int] = None, style: str = "markdown") -> str:
+    summary = data.get('summary', {})
+    if is_error(summary):
+        return render_error(clean_code, summary or {}, style)
+
+    if max_chars is not None or style != "markdown":
+        # Rendu compact : meilleurs éléments de chaque section dans la limite du budget
+        with span("format budgeted", style=style, max_chars=max_chars or 0):
+            return render_budgeted(summary, data, [(key, heading) for key, heading, _ in REPORT_SECTIONS
+                                                   if key in selected], style, max_chars, complete)
 
-## 4. Technologies & Outils
-{formatters.format_technology(data.get('technology_skills', {}), limit_per_cat=6)}
+    # Construction du rapport
+    with span("format summary"):
+        report = render_header(summary)
+    # Seuls les formateurs des sections demandées sont exécutés
+    for key, _heading, _formatter in REPORT_SECTIONS:
+        if key in selected:
+            report += render_section(key, data.get(key, {}), complete)
 
-## 5. Compétences Transversales (Skills)
-{formatters.format_scored_elements(data.get('skills', {}))}
+    return report
 
-## 6. Capacités (Abilities)
-{formatters.format_scored_elements(data.get('abilities', {}))}
 
-## 7. Connaissances (Knowledge)
-{formatters.format_scored_elements(data.get('knowledge', {}))}
+async def get_details_logic(client: OnetClient, soc_code: str, sections: Optional[List[str]] = None,
+                            complete: bool = False, max_chars: Optional[int] = None, style: str = "markdown") -> str:
+    """
+    Logique d'agrégation et de création du rapport complet.
+    `sections` limite le rapport (et les appels API) aux sections demandées.
+    `complete` récupère toutes les pages des listes et les affiche sans plafond.
+    `max_chars` / `style` : rendu compact sous budget (voir app/budget.py).
+    """
+    clean_code = _clean_code(soc_code)
+    selected = normalize_sections(sections)
+    check_style(style)
 
-## 8. Contexte de Travail (Work Context)
-{formatters.format_work_context(data.get('work_context', {}))}
+    with span("fetch", soc_code=clean_code, sections=len(selected)):
+        data = await client.get_full_occupation_details(clean_code, selected, complete)
+    with span("render"):
+        return render_report(clean_code, data, selected, complete, max_chars, style)
 
-## 9. Éducation & Diplômes
-{formatters.format_education(data.get('education', {}))}
-"""
-    return report
\ No newline at end of file
+
+async def stream_details_logic(client: OnetClient, soc_code: str, sections: Optional[List[str]] = None,
+                               on_section: Optional[SectionCallback] = None, complete: bool = False,
+                               max_chars: Optional[int] = None, style: str = "markdown") -> str:
+    """
+    Variante progressive : chaque section est formatée dès que son endpoint répond
+    et transmise à `on_section(clé, texte, sections reçues, total)`.
+    Retourne ensuite le rapport assemblé, identique à get_details_logic
+    (le budget `max_chars` / `style` ne s'applique qu'à ce rapport final).
+    """
+    clean_code = _clean_code(soc_code)
+    selected = normalize_sections(sections)
+    check_style(style)
+
+    data = {}
+    async for key, payload in client.iter_occupation_sections(clean_code, selected, complete):
+        data[key] = payload
+        if on_section is None:
+            continue
+        if key != "summary":
+            text = render_section(key, payload, complete)
+        elif is_error(payload):
+            text = render_error(clean_code, payload)
+        else:
+            text = render_header(payload)
+        await on_section(key, text, len(data), len(selected))
+
+    return render_report(clean_code, data, selected, complete, max_chars, style)
+
+
+async def get_details_batch_logic(client: OnetClient, soc_codes: List[str], max_codes: int = 25,
+                                  sections: Optional[List[str]] = None, complete: bool = False,
+                                  max_chars: Optional[int] = None, style: str = "markdown") -> str:
+    """
+    Rapports de plusieurs codes SOC en un seul appel.
+    L'ordre des codes est conservé, une erreur sur un code n'affecte pas les autres.
+    La concurrence réelle est bornée par le client (plafond global d'appels O*NET).
+    `max_chars` s'applique à chaque rapport. En JSON, un seul objet : code SOC -> rapport
+    (ou {"error", "detail"} pour un code en échec).
+    """
+    # Nettoyage + dédoublonnage en conservant l'ordre
+    codes = list(dict.fromkeys(
+        c.strip().replace("'", "").replace('"', "") for c in soc_codes if c and c.strip()
+    ))
+    if not codes:
+        return "Aucun code SOC fourni."
+    if len(codes) > max_codes:
+        raise ValueError(f"Trop de codes SOC ({len(codes)}), maximum {max_codes} par appel")
+    # Validation une seule fois (sections ou format inconnus = erreur de l'appel, pas de chaque code)
+    sections = normalize_sections(sections)
+    check_style(style)
+
+    results = await asyncio.gather(
+        *(get_details_logic(client, code, sections, complete, max_chars, style) for code in codes),
+        return_exceptions=True
+    )
+
+    if style == "json":
+        documents = {code: {"error": type(result).__name__, "detail": str(result)}
+                     if isinstance(result, BaseException) else json.loads(result)
+                     for code, result in zip(codes, results)}
+        return json.dumps(documents, ensure_ascii=False, separators=(",", ":"))
+
+    reports = []
+    for code, result in zip(codes, results):
+        if isinstance(result, BaseException):
+            reports.append(f"ERREUR pour le code '{code}' : {result}\n")
+        else:
+            reports.append(result)
+
+    return "\n---\n".join(reports)
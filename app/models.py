@@ -0,0 +1,245 @@
+"""
+Modèles compacts et immuables des sections O*NET.
+
+Chaque réponse est décodée une seule fois en NamedTuple (stockage en tuple, sans
+__dict__) ne gardant que les champs affichés, avec les listes déjà triées dans
+l'ordre du rapport : les formateurs ne modifient plus rien et un même modèle peut
+être mis en cache et partagé entre sessions. Les libellés répétés d'un métier à
+l'autre (noms de compétences, catégories...) sont internés.
+"""
+import json
+import sys
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple, Union
+
+try:
+    import orjson
+
+    def loads(data: Union[bytes, str]) -> Any:
+        return orjson.loads(data)
+except ImportError:  # décodeur standard si orjson n'est pas installé
+    def loads(data: Union[bytes, str]) -> Any:
+        return json.loads(data)
+
+
+def _text(value: Any) -> Any:
+    """Interne les chaînes (partagées entre toutes les fiches en mémoire)."""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _score(value: Any) -> Any:
+    return value if value is not None else 0
+
+
+class Summary(NamedTuple):
+    code: Optional[str]
+    title: Optional[str]
+    description: Optional[str]
+    sample_titles: Tuple[str, ...]
+
+
+class Task(NamedTuple):
+    id: Any
+    title: str
+    importance: Any
+    category: str
+
+
+class TaskList(NamedTuple):
+    total: Optional[int]
+    # Triées par importance décroissante
+    items: Tuple[Task, ...]
+
+
+class Tool(NamedTuple):
+    title: str
+    hot_technology: bool
+    in_demand: bool
+    percentage: Any
+
+
+class TechnologyCategory(NamedTuple):
+    code: Any
+    title: str
+    # 'example' puis 'example_more', triés par demande sur le marché
+    tools: Tuple[Tool, ...]
+
+
+class TechnologyList(NamedTuple):
+    total: Optional[int]
+    items: Tuple[TechnologyCategory, ...]
+
+
+class Element(NamedTuple):
+    id: Any
+    name: str
+    importance: Any
+    description: str
+
+
+class ElementList(NamedTuple):
+    """Skills, Knowledge, Abilities, Work Activities."""
+    total: Optional[int]
+    # Triés par importance décroissante
+    items: Tuple[Element, ...]
+
+
+class EducationLevel(NamedTuple):
+    title: str
+    percentage: Any
+
+
+class Education(NamedTuple):
+    # Triés par pourcentage de répondants décroissant
+    items: Tuple[EducationLevel, ...]
+
+
+class Activity(NamedTuple):
+    id: Any
+    title: str
+
+
+class ActivityList(NamedTuple):
+    total: Optional[int]
+    # Ordre de l'API
+    items: Tuple[Activity, ...]
+
+
+class JobZone(NamedTuple):
+    code: Any
+    title: str
+    svp_range: str
+    education: str
+    related_experience: str
+    job_training: str
+
+
+class ContextResponse(NamedTuple):
+    description: str
+    percentage: Any
+
+
+class ContextElement(NamedTuple):
+    id: Any
+    name: str
+    context: Any
+    # Triées par pourcentage décroissant : la première est la plus fréquente
+    responses: Tuple[ContextResponse, ...]
+
+
+class WorkContext(NamedTuple):
+    total: Optional[int]
+    # Triés par score de contexte décroissant
+    items: Tuple[ContextElement, ...]
+
+
+SectionModel = Union[Summary, TaskList, TechnologyList, ElementList, Education,
+                     ActivityList, JobZone, WorkContext]
+
+
+def is_error(data: Any) -> bool:
+    """Section en erreur (dict {"error", "detail"}) ou absente."""
+    return not data or isinstance(data, dict)
+
+
+def parse_summary(data: Dict) -> Summary:
+    return Summary(data.get("code"), data.get("title"), data.get("description"),
+                   tuple(data.get("sample_of_reported_titles") or ()))
+
+
+def parse_tasks(data: Dict) -> TaskList:
+    tasks = [Task(item.get("id"), item.get("title", "Titre non spécifié"), item.get("importance", 0),
+                  _text(item.get("category", "N/A")))
+             for item in data.get("task", [])]
+    tasks.sort(key=lambda t: t.importance, reverse=True)
+    return TaskList(data.get("total"), tuple(tasks))
+
+
+def _tool(item: Dict) -> Tool:
+    return Tool(_text(item.get("title", "Inconnu")), item.get("hot_technology", False),
+                item.get("in_demand", False), item.get("percentage", 0))
+
+
+def tool_score(tool: Tool) -> Any:
+    # Algorithme de tri simple : demande sur le marché, puis technologie "hot"
+    return tool.percentage + (50 if tool.in_demand else 0) + (20 if tool.hot_technology else 0)
+
+
+def parse_technology(data: Dict) -> TechnologyList:
+    categories = []
+    for cat in data.get("category", []):
+        tools = [_tool(t) for t in cat.get("example", []) + cat.get("example_more", [])]
+        tools.sort(key=tool_score, reverse=True)
+        categories.append(TechnologyCategory(cat.get("code"), _text(cat.get("title", "Divers")), tuple(tools)))
+    return TechnologyList(data.get("total"), tuple(categories))
+
+
+def parse_elements(data: Dict) -> ElementList:
+    elements = [Element(item.get("id"), _text(item.get("name", "Inconnu")), item.get("importance", 0),
+                        _text(item.get("description", "").strip()))
+                for item in data.get("element", [])]
+    elements.sort(key=lambda e: e.importance, reverse=True)
+    return ElementList(data.get("total"), tuple(elements))
+
+
+def parse_education(data: Dict) -> Education:
+    # le tableau est sous "response", parfois sous "level"
+    items = data.get("response", []) or data.get("level", [])
+    levels = [EducationLevel(_text(item.get("title") or item.get("name", "N/A")),
+                             _score(item.get("percentage_of_respondents") or item.get("percentage", 0)))
+              for item in items]
+    levels.sort(key=lambda level: level.percentage, reverse=True)
+    return Education(tuple(levels))
+
+
+def parse_dwa(data: Dict) -> ActivityList:
+    return ActivityList(data.get("total"), tuple(
+        Activity(item.get("id"), _text(item.get("title", "").strip())) for item in data.get("activity", [])
+    ))
+
+
+def parse_job_zone(data: Dict) -> JobZone:
+    # les clés sont à la racine, mais par sécurité on vérifie
+    target = data.get("job_zone", data)
+    # Si c'est une liste (cas rare), on prend le premier
+    if isinstance(target, list) and target:
+        target = target[0]
+    return JobZone(target.get("code", "?"), _text(target.get("title", "Titre non spécifié")),
+                   _text(target.get("svp_range", "Non spécifié")), _text(target.get("education", "Non spécifié")),
+                   _text(target.get("related_experience", "Non spécifié")),
+                   _text(target.get("job_training", "Non spécifié")))
+
+
+def parse_work_context(data: Dict) -> WorkContext:
+    elements = []
+    for item in data.get("element", []):
+        # Réponses vides ignorées : l'élément est alors affiché sans réponse
+        responses = [ContextResponse(_text(r.get("description", "")), r.get("percentage_of_respondents", 0))
+                     for r in item.get("response", []) if r]
+        responses.sort(key=lambda r: r.percentage, reverse=True)
+        elements.append(ContextElement(item.get("id"), _text(item.get("name", "Inconnu")),
+                                       item.get("context", 0), tuple(responses)))
+    elements.sort(key=lambda e: e.context, reverse=True)
+    return WorkContext(data.get("total"), tuple(elements))
+
+
+# Section -> décodeur (mêmes clés que SECTION_ENDPOINTS)
+PARSERS: Dict[str, Callable[[Dict], SectionModel]] = {
+    "summary": parse_summary,
+    "tasks": parse_tasks,
+    "technology_skills": parse_technology,
+    "skills": parse_elements,
+    "knowledge": parse_elements,
+    "work_activities": parse_elements,
+    "abilities": parse_elements,
+    "education": parse_education,
+    "detailed_work_activities": parse_dwa,
+    "job_zone": parse_job_zone,
+    "work_context": parse_work_context,
+}
+
+
+def parse_section(section: str, data: Any) -> Union[SectionModel, Dict]:
+    """Payload JSON d'une section -> modèle ; les erreurs (dict "error") sont renvoyées telles quelles."""
+    if not isinstance(data, dict) or not data or "error" in data:
+        return data
+    return PARSERS[section](data)
@@ -0,0 +1,377 @@
+import csv
+import json
+import os
+import sqlite3
+import time
+from collections import defaultdict
+from typing import AsyncIterator, Dict, Iterable, Iterator, Optional, Tuple
+
+from .config import env_int
+from .models import loads, parse_section
+from .reverse_index import ReverseIndex
+from .search_index import SearchIndex
+from .sections import normalize_sections
+from .similarity import SimilarityIndex
+
+# Version du schéma SQLite (à incrémenter si la structure des tables change)
+SCHEMA_VERSION = 1
+
+# Fichiers "scored elements" de la release O*NET (échelle IM = importance)
+SCORED_FILES = {
+    "skills": "Skills.txt",
+    "knowledge": "Knowledge.txt",
+    "abilities": "Abilities.txt",
+    "work_activities": "Work Activities.txt",
+}
+
+
+# LECTURE DE LA RELEASE O*NET (format texte, tabulations)
+
+def _read_rows(release_dir: str, filename: str) -> Iterator[Dict[str, str]]:
+    """Lit un fichier tabulé de la release. Fichier absent = aucune ligne."""
+    path = os.path.join(release_dir, filename)
+    if not os.path.exists(path):
+        return
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        reader = csv.DictReader(f, delimiter="\t", quoting=csv.QUOTE_NONE)
+        for row in reader:
+            yield {k.strip(): (v or "").strip() for k, v in row.items() if k}
+
+
+def _col(row: Dict[str, str], *names: str) -> str:
+    """Premier champ présent parmi plusieurs intitulés (ils varient selon les versions)."""
+    for name in names:
+        if row.get(name):
+            return row[name]
+    return ""
+
+
+def _to_float(value: str) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _scale_100(value: str) -> int:
+    """Convertit une échelle 1-5 (base O*NET) en 0-100 (comme l'API Web Services)."""
+    return round((_to_float(value) - 1) / 4 * 100)
+
+
+def _descriptions(release_dir: str) -> Dict[str, str]:
+    return {
+        row["Element ID"]: row.get("Description", "")
+        for row in _read_rows(release_dir, "Content Model Reference.txt")
+    }
+
+
+def _categories(release_dir: str, filename: str, scale_id: str) -> Dict[tuple, str]:
+    return {
+        (row["Element ID"], row["Category"]): row.get("Category Description", "")
+        for row in _read_rows(release_dir, filename)
+        if row.get("Scale ID") == scale_id
+    }
+
+
+def _build_payloads(release_dir: str) -> Dict[str, Dict[str, Dict]]:
+    """
+    Transforme les fichiers de la release en payloads au format de l'API v2
+    (mêmes clés que celles lues par app/formatters.py), par code SOC et par section.
+    """
+    payloads: Dict[str, Dict[str, Dict]] = defaultdict(dict)
+    descriptions = _descriptions(release_dir)
+
+    # 0. Infos de base + titres rapportés
+    reported = defaultdict(list)
+    for row in _read_rows(release_dir, "Sample of Reported Titles.txt"):
+        reported[row["O*NET-SOC Code"]].append(_col(row, "Reported Job Title", "Reported Title"))
+    for row in _read_rows(release_dir, "Occupation Data.txt"):
+        code = row["O*NET-SOC Code"]
+        payloads[code]["summary"] = {
+            "code": code,
+            "title": row.get("Title", ""),
+            "description": row.get("Description", ""),
+            "sample_of_reported_titles": reported.get(code, [])
+        }
+
+    # 1. Tâches (importance = échelle IM)
+    importance = {}
+    for row in _read_rows(release_dir, "Task Ratings.txt"):
+        if row.get("Scale ID") == "IM":
+            importance[(row["O*NET-SOC Code"], row["Task ID"])] = _scale_100(row["Data Value"])
+    tasks = defaultdict(list)
+    for row in _read_rows(release_dir, "Task Statements.txt"):
+        code, task_id = row["O*NET-SOC Code"], row["Task ID"]
+        tasks[code].append({
+            "id": task_id,
+            "title": row.get("Task", ""),
+            "category": row.get("Task Type") or "N/A",
+            "importance": importance.get((code, task_id), 0)
+        })
+    for code, items in tasks.items():
+        items.sort(key=lambda x: x["importance"], reverse=True)
+        payloads[code]["tasks"] = {"task": items, "total": len(items)}
+
+    # 2. Technologies, regroupées par catégorie (commodity)
+    tech = defaultdict(dict)
+    for row in _read_rows(release_dir, "Technology Skills.txt"):
+        code = row["O*NET-SOC Code"]
+        cat_code = row.get("Commodity Code", "")
+        category = tech[code].setdefault(cat_code, {
+            "code": cat_code, "title": row.get("Commodity Title", ""), "example": []
+        })
+        category["example"].append({
+            "title": _col(row, "Example", "Title"),
+            "hot_technology": row.get("Hot Technology") == "Y",
+            "in_demand": row.get("In Demand") == "Y"
+        })
+    for code, categories in tech.items():
+        items = list(categories.values())
+        for cat in items:
+            cat["example"].sort(key=lambda x: (x["in_demand"], x["hot_technology"]), reverse=True)
+        items.sort(key=lambda c: len(c["example"]), reverse=True)
+        payloads[code]["technology_skills"] = {"category": items, "total": len(items)}
+
+    # 3-5, 10. Skills, Knowledge, Work Activities, Abilities
+    for section, filename in SCORED_FILES.items():
+        elements = defaultdict(list)
+        for row in _read_rows(release_dir, filename):
+            if row.get("Scale ID") != "IM" or row.get("Recommend Suppress") == "Y":
+                continue
+            elements[row["O*NET-SOC Code"]].append({
+                "id": row["Element ID"],
+                "name": row.get("Element Name", ""),
+                "description": descriptions.get(row["Element ID"], ""),
+                "importance": _scale_100(row["Data Value"])
+            })
+        for code, items in elements.items():
+            items.sort(key=lambda x: x["importance"], reverse=True)
+            payloads[code][section] = {"element": items, "total": len(items)}
+
+    # 6. Éducation (échelle RL : pourcentage de répondants par niveau)
+    levels = _categories(release_dir, "Education, Training, and Experience Categories.txt", "RL")
+    education = defaultdict(list)
+    for row in _read_rows(release_dir, "Education, Training, and Experience.txt"):
+        if row.get("Scale ID") != "RL":
+            continue
+        pct = round(_to_float(row["Data Value"]))
+        if pct > 0:
+            education[row["O*NET-SOC Code"]].append({
+                "title": levels.get((row["Element ID"], row["Category"]), row["Category"]),
+                "percentage_of_respondents": pct
+            })
+    for code, items in education.items():
+        payloads[code]["education"] = {"response": items}
+
+    # 7. Activités détaillées (DWA), via les tâches
+    dwa_titles = {
+        row["DWA ID"]: row.get("DWA Title", "")
+        for row in _read_rows(release_dir, "DWA Reference.txt")
+    }
+    dwas = defaultdict(dict)
+    for row in _read_rows(release_dir, "Tasks to DWAs.txt"):
+        dwa_id = row["DWA ID"]
+        title = dwa_titles.get(dwa_id) or row.get("DWA Title", "")
+        dwas[row["O*NET-SOC Code"]].setdefault(dwa_id, {"id": dwa_id, "title": title})
+    for code, items in dwas.items():
+        activities = list(items.values())
+        payloads[code]["detailed_work_activities"] = {"activity": activities, "total": len(activities)}
+
+    # 8. Job Zone
+    zones = {row["Job Zone"]: row for row in _read_rows(release_dir, "Job Zone Reference.txt")}
+    for row in _read_rows(release_dir, "Job Zones.txt"):
+        ref = zones.get(row["Job Zone"], {})
+        payloads[row["O*NET-SOC Code"]]["job_zone"] = {
+            "code": int(row["Job Zone"]) if row["Job Zone"].isdigit() else row["Job Zone"],
+            "title": ref.get("Name", ""),
+            "education": ref.get("Education", ""),
+            "related_experience": ref.get("Experience", ""),
+            "job_training": ref.get("Job Training", ""),
+            "svp_range": ref.get("SVP Range", "")
+        }
+
+    # 9. Contexte de travail (CX = score, CXP = répartition des réponses)
+    answers = _categories(release_dir, "Work Context Categories.txt", "CXP")
+    context = defaultdict(dict)
+    for row in _read_rows(release_dir, "Work Context.txt"):
+        scale = row.get("Scale ID")
+        if scale not in ("CX", "CXP"):
+            continue
+        element_id = row["Element ID"]
+        item = context[row["O*NET-SOC Code"]].setdefault(element_id, {
+            "id": element_id,
+            "name": row.get("Element Name", ""),
+            "description": descriptions.get(element_id, ""),
+            "context": 0,
+            "response": []
+        })
+        if scale == "CX":
+            item["context"] = _scale_100(row["Data Value"])
+        else:
+            item["response"].append({
+                "description": answers.get((element_id, row["Category"]), row["Category"]),
+                "percentage_of_respondents": round(_to_float(row["Data Value"]))
+            })
+    for code, items in context.items():
+        elements = sorted(items.values(), key=lambda x: x["context"], reverse=True)
+        payloads[code]["work_context"] = {"element": elements, "total": len(elements)}
+
+    return payloads
+
+
+def ingest_release(release_dir: str, db_path: str, version: Optional[str] = None) -> Dict:
+    """
+    Ingère une release texte de la base O*NET dans un fichier SQLite indexé.
+    Les payloads sont pré-calculés au format de l'API : une lecture = une clé primaire.
+    """
+    if not os.path.isfile(os.path.join(release_dir, "Occupation Data.txt")):
+        raise ValueError(f"Release O*NET invalide (Occupation Data.txt absent) : {release_dir}")
+
+    payloads = _build_payloads(release_dir)
+    version = version or os.path.basename(os.path.normpath(release_dir))
+
+    # Écriture dans un fichier temporaire puis remplacement atomique
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    tmp_path = f"{db_path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.executescript("""
+            CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            CREATE TABLE occupations (code TEXT PRIMARY KEY, title TEXT NOT NULL, description TEXT);
+            CREATE TABLE titles (code TEXT NOT NULL, title TEXT NOT NULL, kind TEXT NOT NULL);
+            CREATE INDEX idx_titles_code ON titles(code);
+            CREATE TABLE sections (
+                code TEXT NOT NULL, section TEXT NOT NULL, payload TEXT NOT NULL,
+                PRIMARY KEY (code, section)
+            ) WITHOUT ROWID;
+        """)
+
+        occupations = [(code, p["summary"]["title"], p["summary"]["description"])
+                       for code, p in payloads.items() if "summary" in p]
+        conn.executemany("INSERT INTO occupations VALUES (?, ?, ?)", occupations)
+
+        titles = [(row["O*NET-SOC Code"], _col(row, "Alternate Title"), "alternate")
+                  for row in _read_rows(release_dir, "Alternate Titles.txt")]
+        titles += [(code, title, "reported")
+                   for code, p in payloads.items() if "summary" in p
+                   for title in p["summary"]["sample_of_reported_titles"]]
+        conn.executemany("INSERT INTO titles VALUES (?, ?, ?)", [t for t in titles if t[1]])
+
+        conn.executemany(
+            "INSERT INTO sections VALUES (?, ?, ?)",
+            ((code, section, json.dumps(payload, ensure_ascii=False, separators=(",", ":")))
+             for code, sections in payloads.items() if "summary" in sections
+             for section, payload in sections.items())
+        )
+
+        meta = {
+            "schema_version": str(SCHEMA_VERSION),
+            "release": version,
+            "ingested_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "occupations": str(len(occupations))
+        }
+        conn.executemany("INSERT INTO meta VALUES (?, ?)", meta.items())
+        conn.commit()
+    finally:
+        conn.close()
+
+    os.replace(tmp_path, db_path)
+    return meta
+
+
+# BACKEND HORS LIGNE
+
+class OfflineOnetClient:
+    """
+    Backend hors ligne : même interface que OnetClient, servie depuis la base SQLite
+    produite par `python -m app.ingest`. Aucun appel réseau, sauf repli optionnel
+    sur l'API (fallback) pour les codes absents de la base locale.
+    """
+
+    def __init__(self, db_path: str, fallback=None, search_index: Optional[SearchIndex] = None,
+                 similarity_index: Optional[SimilarityIndex] = None, reverse_index: Optional[ReverseIndex] = None):
+        if not os.path.isfile(db_path):
+            raise ValueError(f"Base O*NET locale introuvable : {db_path} (lancer `python -m app.ingest`)")
+
+        # Lecture seule : la base peut être partagée entre plusieurs processus
+        self.db_path = db_path
+        self.conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, check_same_thread=False)
+        self.meta = dict(self.conn.execute("SELECT key, value FROM meta"))
+        if self.meta.get("schema_version") != str(SCHEMA_VERSION):
+            raise ValueError(
+                f"Schéma de base locale incompatible ({self.meta.get('schema_version')} "
+                f"au lieu de {SCHEMA_VERSION}) : relancer l'ingestion"
+            )
+        self.fallback = fallback
+
+        # Index plein texte construit une fois au démarrage (ou chargé depuis un fichier)
+        self.search_index = search_index or SearchIndex.from_offline(self.conn)
+        self.search_limit = env_int("ONET_SEARCH_LIMIT", 5)
+
+        # Index des métiers proches et index inversé (idem) ; les codes servis par le repli API y sont ajoutés
+        self.similarity_index = similarity_index if similarity_index is not None \
+            else SimilarityIndex.from_offline(self.conn)
+        self.reverse_index = reverse_index if reverse_index is not None else ReverseIndex.from_offline(self.conn)
+        if fallback is not None:
+            fallback.listeners.append(self.similarity_index.on_occupation)
+            fallback.listeners.append(self.reverse_index.on_occupation)
+
+    @property
+    def version(self) -> str:
+        return self.meta.get("release", "inconnue")
+
+    async def aclose(self) -> None:
+        self.conn.close()
+        if self.fallback is not None:
+            await self.fallback.aclose()
+
+    def stats(self) -> Dict:
+        stats = {"backend": "offline", "release": self.version,
+                 "occupations": int(self.meta.get("occupations", 0))}
+        if self.fallback is not None:
+            stats["fallback"] = self.fallback.stats()
+        return stats
+
+    def has_occupation(self, soc_code: str) -> bool:
+        row = self.conn.execute("SELECT 1 FROM occupations WHERE code = ?", (soc_code,)).fetchone()
+        return row is not None
+
+    async def search_occupation(self, keyword: str, limit: Optional[int] = None) -> Dict:
+        """Recherche par keyword (titres, titres alternatifs et titres rapportés)."""
+        return self.search_index.search_response(keyword, limit or self.search_limit)
+
+    async def get_full_occupation_details(self, soc_code: str, sections: Optional[Iterable[str]] = None,
+                                          complete: bool = False) -> Dict:
+        """
+        Rapport depuis la base locale (mêmes clés que l'API), limité aux sections demandées.
+        Les listes locales sont toujours complètes : `complete` ne sert qu'au repli API.
+        """
+        soc_code = soc_code.strip()
+        sections = normalize_sections(sections)
+        if not self.has_occupation(soc_code):
+            if self.fallback is not None:
+                return await self.fallback.get_full_occupation_details(soc_code, sections, complete)
+            error = {"error": "Not Found",
+                     "detail": f"Code SOC inconnu dans la base locale (release {self.version})"}
+            return {section: error for section in sections}
+
+        placeholders = ", ".join("?" * len(sections))
+        rows = dict(self.conn.execute(
+            f"SELECT section, payload FROM sections WHERE code = ? AND section IN ({placeholders})",
+            (soc_code, *sections)
+        ))
+        return {
+            section: parse_section(section, loads(rows[section])) if section in rows
+            else {"error": "Not Available", "detail": "Section absente de la release locale"}
+            for section in sections
+        }
+
+    async def iter_occupation_sections(self, soc_code: str, sections: Optional[Iterable[str]] = None,
+                                       complete: bool = False) -> AsyncIterator[Tuple[str, Dict]]:
+        """Mode streaming : en local toutes les sections sont disponibles immédiatement."""
+        data = await self.get_full_occupation_details(soc_code, sections, complete)
+        for item in data.items():
+            yield item
@@ -0,0 +1,84 @@
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    Limiteur de débit global (token bucket), partagé par toutes les sessions.
+    rate = requêtes/seconde (<= 0 : illimité), burst = rafale max autorisée.
+    Les appelants sont servis dans l'ordre d'arrivée (verrou FIFO).
+    """
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.capacity = max(1, burst if burst else int(rate) or 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+
+                # Pause globale demandée par l'amont (429 + Retry-After)
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+
+                if self.rate <= 0:
+                    return
+
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def try_acquire(self) -> bool:
+        """Jeton immédiat si disponible, sans attendre ni doubler la file (requêtes facultatives)."""
+        now = time.monotonic()
+        if self._lock.locked() or now < self.blocked_until:
+            return False
+        if self.rate <= 0:
+            return True
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def pause(self, delay: float) -> None:
+        """Suspend toutes les requêtes pendant `delay` secondes."""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """En-tête Retry-After : nombre de secondes ou date HTTP."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, base: float, cap: float, retry_after: Optional[float] = None) -> float:
+    """
+    Délai avant la tentative suivante : backoff exponentiel avec jitter complet,
+    ou Retry-After (plus un léger jitter pour désynchroniser les clients).
+    """
+    if retry_after is not None:
+        return min(cap, retry_after + random.uniform(0, base))
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
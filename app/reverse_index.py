@@ -0,0 +1,232 @@
+import heapq
+import json
+import os
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+from .filelock import locked
+from .models import is_error, loads, parse_section, tool_score
+from .search_index import tokenize
+
+# Type de recherche -> section O*NET indexée
+KINDS = {
+    "technology": "technology_skills",
+    "skill": "skills",
+    "knowledge": "knowledge",
+    "activity": "detailed_work_activities",
+}
+
+# Classements : score d'importance (ou de demande pour les technologies), puis drapeaux O*NET d'abord
+RANKINGS = ("importance", "hot", "in_demand")
+
+
+class Posting(NamedTuple):
+    score: float
+    hot: bool
+    in_demand: bool
+
+
+class Match(NamedTuple):
+    code: str
+    title: str
+    term: str
+    score: float
+    hot: bool
+    in_demand: bool
+
+
+def section_entries(kind: str, model) -> Dict[str, Posting]:
+    """Termes indexés d'une section décodée : libellé -> score du métier pour ce terme."""
+    entries = {}
+    if kind == "technology":
+        for cat in model.items:
+            for tool in cat.tools:
+                posting = Posting(float(tool_score(tool)), bool(tool.hot_technology), bool(tool.in_demand))
+                entries[tool.title] = max(entries.get(tool.title, posting), posting)
+            if cat.tools:
+                # La catégorie ("Object or component oriented development software") vaut son meilleur outil
+                entries.setdefault(cat.title, Posting(max(entries[t.title].score for t in cat.tools),
+                                                      any(t.hot_technology for t in cat.tools),
+                                                      any(t.in_demand for t in cat.tools)))
+    elif kind == "activity":
+        # Pas de score d'importance pour les DWA
+        for activity in model.items:
+            if activity.title:
+                entries[activity.title] = Posting(1.0, False, False)
+    else:
+        for element in model.items:
+            entries[element.name] = Posting(float(element.importance or 0), False, False)
+    return entries
+
+
+class ReverseIndex:
+    """
+    Index inversé des métiers par technologie, compétence, connaissance ou activité détaillée :
+    terme -> {code SOC: score}. Une requête sélectionne les termes contenant tous ses mots
+    (ex: "python", "negotiation") et classe les métiers par leur meilleur score.
+    Mis à jour métier par métier (sections reçues seulement), persisté en JSON.
+    """
+
+    def __init__(self):
+        self.titles: Dict[str, str] = {}
+        # kind -> terme -> code -> Posting
+        self.postings: Dict[str, Dict[str, Dict[str, Posting]]] = {kind: {} for kind in KINDS}
+        self.dirty = False
+        # (kind, code) et codes dont les titres ont changé depuis le chargement : seuls fusionnés au save()
+        self.changed: Set[Tuple[str, str]] = set()
+        self.retitled: Set[str] = set()
+        self._finalize()
+
+    def _finalize(self) -> None:
+        """Structures dérivées : termes de chaque métier (mises à jour), mots -> termes (requêtes)."""
+        self.terms_of: Dict[str, Dict[str, Set[str]]] = {kind: defaultdict(set) for kind in KINDS}
+        self.vocabulary: Dict[str, Dict[str, Set[str]]] = {kind: defaultdict(set) for kind in KINDS}
+        for kind, terms in self.postings.items():
+            for term, codes in terms.items():
+                for code in codes:
+                    self.terms_of[kind][code].add(term)
+                for token in tokenize(term):
+                    self.vocabulary[kind][token].add(term)
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    # --- Construction ---
+
+    def _entries(self, kind: str, code: str) -> Dict[str, Posting]:
+        terms = self.postings[kind]
+        return {term: terms[term][code] for term in self.terms_of[kind].get(code, ())}
+
+    def _replace(self, kind: str, code: str, entries: Dict[str, Posting]) -> bool:
+        terms = self.postings[kind]
+        current = self._entries(kind, code)
+        if current == entries:
+            return False
+        for term in current.keys() - entries.keys():
+            del terms[term][code]
+            if not terms[term]:
+                del terms[term]
+                for token in tokenize(term):
+                    self.vocabulary[kind][token].discard(term)
+        for term, posting in entries.items():
+            if term not in terms:
+                terms[term] = {}
+                for token in tokenize(term):
+                    self.vocabulary[kind][token].add(term)
+            terms[term][code] = posting
+        self.terms_of[kind][code] = set(entries)
+        return True
+
+    def update(self, code: str, title: Optional[str], data: Dict) -> bool:
+        """Indexe les sections disponibles d'un rapport (les autres restent inchangées)."""
+        changed = False
+        for kind, section in KINDS.items():
+            model = data.get(section)
+            if not is_error(model) and self._replace(kind, code, section_entries(kind, model)):
+                self.changed.add((kind, code))
+                changed = True
+        if title and self.titles.get(code) != title:
+            self.titles[code] = title
+            self.retitled.add(code)
+            changed = True
+        elif changed:
+            self.titles.setdefault(code, "")
+        self.dirty |= changed
+        return changed
+
+    def on_occupation(self, soc_code: str, data: Dict) -> None:
+        """Écouteur du client API : chaque rapport récupéré enrichit l'index."""
+        summary = data.get("summary")
+        self.update(soc_code, None if is_error(summary) else summary.title, data)
+
+    @classmethod
+    def from_offline(cls, conn) -> "ReverseIndex":
+        """Construit l'index depuis la base SQLite du mode hors ligne."""
+        index = cls()
+        placeholders = ", ".join("?" * len(KINDS))
+        sections = defaultdict(dict)
+        for code, section, payload in conn.execute(
+                f"SELECT code, section, payload FROM sections WHERE section IN ({placeholders})",
+                tuple(KINDS.values())):
+            sections[code][section] = parse_section(section, loads(payload))
+        for code, title in conn.execute("SELECT code, title FROM occupations ORDER BY code"):
+            index.update(code, title, sections.get(code, {}))
+        index.dirty = False
+        index.changed.clear()
+        index.retitled.clear()
+        return index
+
+    # --- Persistance ---
+
+    def _write(self, path: str) -> None:
+        data = {"titles": self.titles, "postings": self.postings}
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    def save(self, path: str, merge: bool = True) -> None:
+        """
+        Écriture atomique, fusionnée sous verrou avec l'index sur disque : avec plusieurs workers,
+        chacun n'y reporte que les sections et titres qu'il a mis à jour, sans écraser ceux des autres.
+        merge=False : le fichier est remplacé par cet index (reconstruction à l'ingestion).
+        """
+        if not merge:
+            self._write(path)
+        else:
+            with locked(path):
+                on_disk = ReverseIndex.load(path) if os.path.isfile(path) else ReverseIndex()
+                for kind, code in self.changed:
+                    on_disk._replace(kind, code, self._entries(kind, code))
+                    on_disk.titles.setdefault(code, self.titles.get(code, ""))
+                for code in self.retitled:
+                    on_disk.titles[code] = self.titles[code]
+                on_disk._write(path)
+        self.changed.clear()
+        self.retitled.clear()
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path: str) -> "ReverseIndex":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        index = cls()
+        index.titles = data["titles"]
+        index.postings = {
+            kind: {term: {code: Posting(*p) for code, p in codes.items()}
+                   for term, codes in data["postings"].get(kind, {}).items()}
+            for kind in KINDS
+        }
+        index._finalize()
+        return index
+
+    # --- Recherche ---
+
+    def lookup(self, kind: str, query: str, limit: int = 10, rank: str = "importance") -> List[Match]:
+        """Métiers dont un terme contient tous les mots de la requête, classés selon `rank`."""
+        if kind not in KINDS:
+            raise ValueError(f"Type de recherche inconnu : '{kind}' (attendu : {', '.join(KINDS)})")
+        if rank not in RANKINGS:
+            raise ValueError(f"Classement inconnu : '{rank}' (attendu : {', '.join(RANKINGS)})")
+        tokens = tokenize(query)
+        if not tokens or limit <= 0:
+            return []
+        vocabulary = self.vocabulary[kind]
+        terms = set.intersection(*(vocabulary.get(token, set()) for token in tokens))
+
+        def key(posting: Posting) -> Tuple:
+            if rank == "importance":
+                return (posting.score,)
+            return (getattr(posting, rank), posting.score)
+
+        # Meilleur terme de chaque métier
+        best: Dict[str, Tuple[str, Posting]] = {}
+        for term in terms:
+            for code, posting in self.postings[kind][term].items():
+                if code not in best or key(posting) > key(best[code][1]):
+                    best[code] = (term, posting)
+
+        # Sélection partielle des `limit` meilleurs (à égalité : ordre des codes)
+        top = heapq.nsmallest(limit, best.items(),
+                              key=lambda item: (tuple(-value for value in key(item[1][1])), item[0]))
+        return [Match(code, self.titles.get(code, ""), term, *posting) for code, (term, posting) in top]
@@ -0,0 +1,211 @@
+import heapq
+import json
+import math
+import re
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Poids des champs (BM25F simplifié : fréquences pondérées)
+FIELD_WEIGHTS = {"title": 3.0, "alternate": 1.0, "reported": 1.5}
+
+# Pénalités des correspondances approximatives
+PREFIX_FACTOR = 0.7
+TYPO_FACTOR = 0.5
+MAX_PREFIX_EXPANSIONS = 30
+
+
+def tokenize(text: str) -> List[str]:
+    """Minuscules, sans accents, découpage alphanumérique."""
+    text = unicodedata.normalize("NFKD", text or "").encode("ascii", "ignore").decode("ascii")
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _deletes(term: str) -> List[str]:
+    """Variantes à une suppression près (index des fautes de frappe, "symmetric delete")."""
+    return [term[:i] + term[i + 1:] for i in range(len(term))]
+
+
+def _within_one_edit(a: str, b: str) -> bool:
+    """Distance de Damerau-Levenshtein <= 1."""
+    if a == b:
+        return True
+    la, lb = len(a), len(b)
+    if abs(la - lb) > 1:
+        return False
+    if la == lb:
+        diff = [i for i in range(la) if a[i] != b[i]]
+        if len(diff) == 1:
+            return True
+        # Transposition de deux lettres adjacentes
+        return (len(diff) == 2 and diff[1] == diff[0] + 1
+                and a[diff[0]] == b[diff[1]] and a[diff[1]] == b[diff[0]])
+    if la > lb:
+        a, b = b, a
+    # b a exactement une lettre de plus que a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    return a[i:] == b[i + 1:]
+
+
+class SearchIndex:
+    """
+    Index plein texte en mémoire des métiers (titre, titres alternatifs, titres rapportés).
+    Classement BM25 (k1, b), tolérance aux préfixes et aux fautes de frappe (1 édition).
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.codes: List[str] = []
+        self.titles: List[str] = []
+        self.doc_lengths: List[float] = []
+        self.postings: Dict[str, List[Tuple[int, float]]] = {}
+        self._finalize()
+
+    # --- Construction ---
+
+    @classmethod
+    def build(cls, occupations: Iterable[Tuple[str, str, Sequence[Tuple[str, str]]]]) -> "SearchIndex":
+        """
+        Construit l'index à partir de (code, titre, [(titre, type), ...]),
+        type = "alternate" ou "reported".
+        """
+        index = cls()
+        postings = defaultdict(list)
+        for code, title, other_titles in occupations:
+            doc_id = len(index.codes)
+            index.codes.append(code)
+            index.titles.append(title)
+
+            tf = defaultdict(float)
+            length = 0.0
+            fields = [(title, "title")] + list(other_titles)
+            # Le code SOC est lui-même cherchable ("15-1252")
+            fields.append((code, "title"))
+            for text, kind in fields:
+                weight = FIELD_WEIGHTS.get(kind, 1.0)
+                for token in tokenize(text):
+                    tf[token] += weight
+                    length += weight
+            index.doc_lengths.append(length)
+            for token, freq in tf.items():
+                postings[token].append((doc_id, freq))
+
+        index.postings = dict(postings)
+        index._finalize()
+        return index
+
+    @classmethod
+    def from_offline(cls, conn) -> "SearchIndex":
+        """Construit l'index depuis la base SQLite du mode hors ligne."""
+        others = defaultdict(list)
+        for code, title, kind in conn.execute("SELECT code, title, kind FROM titles"):
+            others[code].append((title, kind))
+        rows = conn.execute("SELECT code, title FROM occupations ORDER BY code").fetchall()
+        return cls.build((code, title, others.get(code, [])) for code, title in rows)
+
+    def _finalize(self) -> None:
+        """Structures dérivées : vocabulaire trié (préfixes), suppressions (fautes), IDF."""
+        n = len(self.codes)
+        self.avg_length = (sum(self.doc_lengths) / n) if n else 0.0
+        self.vocabulary = sorted(self.postings)
+        self.idf = {
+            term: math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self.postings.items()
+        }
+        self.delete_map: Dict[str, List[str]] = defaultdict(list)
+        for term in self.vocabulary:
+            if len(term) >= 4:
+                for variant in _deletes(term):
+                    self.delete_map[variant].append(term)
+
+    # --- Persistance (index pré-construit) ---
+
+    def save(self, path: str) -> None:
+        data = {
+            "k1": self.k1, "b": self.b,
+            "codes": self.codes, "titles": self.titles, "doc_lengths": self.doc_lengths,
+            "postings": self.postings
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path: str) -> "SearchIndex":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        index = cls(data["k1"], data["b"])
+        index.codes = data["codes"]
+        index.titles = data["titles"]
+        index.doc_lengths = data["doc_lengths"]
+        index.postings = {t: [tuple(p) for p in docs] for t, docs in data["postings"].items()}
+        index._finalize()
+        return index
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    # --- Recherche ---
+
+    def _expand(self, token: str) -> Dict[str, float]:
+        """Termes du vocabulaire correspondant à un token de requête, avec leur facteur."""
+        matches = {}
+        if token in self.postings:
+            matches[token] = 1.0
+
+        # Préfixe : "develop" -> "developer", "developers"...
+        start = bisect_left(self.vocabulary, token)
+        for term in self.vocabulary[start:start + MAX_PREFIX_EXPANSIONS + 1]:
+            if not term.startswith(token):
+                break
+            matches.setdefault(term, PREFIX_FACTOR)
+
+        # Fautes de frappe (seulement si aucune correspondance exacte, tokens >= 4 lettres)
+        if token not in self.postings and len(token) >= 4:
+            candidates = set(self.delete_map.get(token, []))
+            for variant in _deletes(token):
+                if variant in self.postings:
+                    candidates.add(variant)
+                candidates.update(self.delete_map.get(variant, []))
+            for term in candidates:
+                if _within_one_edit(token, term):
+                    matches.setdefault(term, TYPO_FACTOR)
+        return matches
+
+    def search(self, query: str, limit: int = 5) -> List[Tuple[str, str, float]]:
+        """Retourne [(code, titre, score)] triés par pertinence décroissante."""
+        if not self.codes or limit <= 0:
+            return []
+
+        scores = defaultdict(float)
+        for token in dict.fromkeys(tokenize(query)):
+            # Un document compte la meilleure variante de chaque token de la requête
+            best = defaultdict(float)
+            for term, factor in self._expand(token).items():
+                idf = self.idf[term]
+                for doc_id, tf in self.postings[term]:
+                    norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / self.avg_length)
+                    score = factor * idf * tf * (self.k1 + 1) / (tf + norm)
+                    if score > best[doc_id]:
+                        best[doc_id] = score
+            for doc_id, score in best.items():
+                scores[doc_id] += score
+
+        top = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [(self.codes[doc_id], self.titles[doc_id], round(score, 3)) for doc_id, score in top]
+
+    def search_response(self, keyword: str, limit: int = 5) -> Dict:
+        """Résultat au format de l'endpoint /online/search de l'API."""
+        results = self.search(keyword, limit)
+        return {
+            "keyword": keyword,
+            "occupation": [
+                {"code": code, "title": title, "relevance_score": score}
+                for code, title, score in results
+            ]
+        }
@@ -0,0 +1,80 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Paramètres standards de pagination
+PAGE = {"start": 1, "end": 20}
+
+# Pour Detailed Work Activities
+PAGE_DWA = {"start": 1, "end": 35}
+
+# Section -> (endpoint relatif à /online/occupations/{code}, paramètres)
+SECTION_ENDPOINTS: Dict[str, Tuple[str, Optional[Dict]]] = {
+    # 0. Infos de base (Including sample_of_reported_titles)
+    "summary": ("", None),
+    # 1. Tâches
+    "tasks": ("details/tasks", PAGE),
+    # 2. Technologies (hot technologies, in demand, pourcentage)
+    "technology_skills": ("details/technology_skills", PAGE),
+    # 3. Skills (Compétences)
+    "skills": ("details/skills", PAGE),
+    # 4. Knowledge (Connaissance / Savoir)
+    "knowledge": ("details/knowledge", PAGE),
+    # 5. Work Activities (Activités professionnelles)
+    "work_activities": ("details/work_activities", PAGE),
+    # 6. Education
+    "education": ("details/education", None),
+    # 7. Detailed Work Activities (Activités pro détaillées)
+    "detailed_work_activities": ("details/detailed_work_activities", PAGE_DWA),
+    # 8. Job Zone (Zone d'emploi)
+    "job_zone": ("details/job_zone", None),
+    # 9. Work Context (Contexte professionnel)
+    "work_context": ("details/work_context", PAGE),
+    # 10. Abilities (Capacités)
+    "abilities": ("details/abilities", PAGE),
+}
+
+SECTIONS = tuple(SECTION_ENDPOINTS)
+
+# Sections paginées -> clé de la liste dans la réponse (mode complet : pages fusionnées sur cette clé)
+LIST_KEYS: Dict[str, str] = {
+    "tasks": "task",
+    "technology_skills": "category",
+    "skills": "element",
+    "knowledge": "element",
+    "work_activities": "element",
+    "detailed_work_activities": "activity",
+    "work_context": "element",
+    "abilities": "element",
+}
+
+# Sections sélectionnables par l'agent (le résumé est toujours inclus)
+OPTIONAL_SECTIONS = tuple(s for s in SECTIONS if s != "summary")
+
+
+def section_endpoint(soc_code: str, section: str) -> str:
+    path, _ = SECTION_ENDPOINTS[section]
+    return f"online/occupations/{soc_code}/{path}" if path else f"online/occupations/{soc_code}"
+
+
+def page_windows(params: Dict, total: int) -> List[Dict]:
+    """Pages suivant la première fenêtre `params` (même taille) jusqu'à `total` éléments."""
+    size = params["end"] - params["start"] + 1
+    return [{"start": start, "end": min(start + size - 1, total)}
+            for start in range(params["end"] + 1, total + 1, size)]
+
+
+def normalize_sections(sections: Optional[Iterable[str]]) -> Tuple[str, ...]:
+    """
+    Valide la liste demandée et la remet dans l'ordre canonique.
+    None ou liste vide = rapport complet. Le résumé est toujours inclus.
+    """
+    if not sections:
+        return SECTIONS
+
+    requested = {s.strip().lower() for s in sections if s and s.strip()}
+    unknown = requested - set(SECTIONS)
+    if unknown:
+        raise ValueError(f"Sections inconnues : {', '.join(sorted(unknown))} "
+                         f"(valides : {', '.join(OPTIONAL_SECTIONS)})")
+
+    requested.add("summary")
+    return tuple(s for s in SECTIONS if s in requested)
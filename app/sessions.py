@@ -0,0 +1,49 @@
+import logging
+import time
+
+import anyio
+from anyio.streams.memory import MemoryObjectSendStream
+
+logger = logging.getLogger("onet-server")
+
+
+class SseSession:
+    """
+    État d'une session SSE : flux vers server.run, dernière activité
+    (message reçu ou envoyé), requêtes en cours et fermeture à l'initiative du serveur.
+    """
+
+    __slots__ = ("session_id", "in_send", "last_activity", "pending")
+
+    def __init__(self, session_id: str, in_send: MemoryObjectSendStream):
+        self.session_id = session_id
+        self.in_send = in_send
+        self.last_activity = time.monotonic()
+        # Requêtes reçues sans réponse envoyée : une session occupée n'est jamais inactive
+        self.pending = 0
+
+    def touch(self) -> None:
+        self.last_activity = time.monotonic()
+
+    def idle_for(self) -> float:
+        if self.pending > 0:
+            return 0.0
+        return time.monotonic() - self.last_activity
+
+    def close(self) -> None:
+        """
+        Ferme le flux entrant : server.run se termine et ferme le flux sortant,
+        ce qui termine proprement le flux SSE.
+        """
+        self.in_send.close()
+
+
+async def reap_when_idle(session: SseSession, timeout: float) -> bool:
+    """Ferme la session après `timeout` secondes sans activité. Retourne True si elle a été fermée."""
+    while True:
+        remaining = timeout - session.idle_for()
+        if remaining <= 0:
+            logger.info(f"Session {session.session_id} inactive depuis {timeout:g}s : fermeture")
+            session.close()
+            return True
+        await anyio.sleep(max(remaining, 0.1))
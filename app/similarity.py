@@ -0,0 +1,221 @@
+import json
+import os
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .filelock import locked
+from .models import is_error, loads, parse_section
+
+# Sections dont les scores d'importance forment le vecteur d'un métier
+VECTOR_SECTIONS = ("skills", "knowledge", "abilities", "work_activities")
+
+
+def occupation_features(data: Dict) -> Dict[str, float]:
+    """Importance de chaque élément ("section:id") des sections disponibles d'un rapport."""
+    features = {}
+    for section in VECTOR_SECTIONS:
+        elements = data.get(section)
+        if is_error(elements):
+            continue
+        for element in elements.items:
+            if element.id is not None and isinstance(element.importance, (int, float)):
+                features[f"{section}:{element.id}"] = float(element.importance)
+    return features
+
+
+def _pad(vector: np.ndarray, size: int) -> np.ndarray:
+    # Dimensions apparues après le calcul du vecteur : score nul
+    if len(vector) >= size:
+        return vector
+    return np.concatenate([vector, np.zeros(size - len(vector), dtype=np.float32)])
+
+
+class SimilarityIndex:
+    """
+    Métiers proches par similarité cosinus des vecteurs d'importance
+    (skills, knowledge, abilities, work activities).
+
+    Les vecteurs normalisés forment une matrice NumPy persistée en .npy
+    (mmap en lecture seule au chargement) avec un fichier JSON compagnon
+    (codes, titres, dimensions). Les métiers ajoutés ou mis à jour ensuite
+    restent en mémoire (`delta`) jusqu'au prochain save().
+    """
+
+    def __init__(self):
+        self.dims: List[str] = []
+        self.dim_index: Dict[str, int] = {}
+        self.titles: Dict[str, str] = {}
+        # Matrice de base : une ligne par code de self.codes
+        self.codes: List[str] = []
+        self.row_of: Dict[str, int] = {}
+        self.matrix = np.zeros((0, 0), dtype=np.float32)
+        # Vecteurs ajoutés depuis la construction / le chargement (prioritaires sur la base)
+        self.delta: Dict[str, np.ndarray] = {}
+        self.dirty = False
+
+    def __len__(self) -> int:
+        return len(self.row_of.keys() | self.delta.keys())
+
+    def __contains__(self, code: str) -> bool:
+        return code in self.delta or code in self.row_of
+
+    # --- Construction ---
+
+    def _vector(self, features: Dict[str, float]) -> Optional[np.ndarray]:
+        for key in features:
+            if key not in self.dim_index:
+                self.dim_index[key] = len(self.dims)
+                self.dims.append(key)
+        vector = np.zeros(len(self.dims), dtype=np.float32)
+        vector[[self.dim_index[key] for key in features]] = list(features.values())
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else None
+
+    @classmethod
+    def build(cls, occupations: Iterable[Tuple[str, str, Dict[str, float]]]) -> "SimilarityIndex":
+        """occupations : (code, titre, {élément: importance})."""
+        index = cls()
+        vectors = []
+        for code, title, features in occupations:
+            vector = index._vector(features)
+            if vector is None:
+                continue
+            index.row_of[code] = len(index.codes)
+            index.codes.append(code)
+            index.titles[code] = title
+            vectors.append(vector)
+        index.matrix = np.stack([_pad(v, len(index.dims)) for v in vectors]) if vectors \
+            else np.zeros((0, len(index.dims)), dtype=np.float32)
+        return index
+
+    @classmethod
+    def from_offline(cls, conn) -> "SimilarityIndex":
+        """Construit l'index depuis la base SQLite du mode hors ligne."""
+        placeholders = ", ".join("?" * len(VECTOR_SECTIONS))
+        sections = defaultdict(dict)
+        for code, section, payload in conn.execute(
+                f"SELECT code, section, payload FROM sections WHERE section IN ({placeholders})", VECTOR_SECTIONS):
+            sections[code][section] = parse_section(section, loads(payload))
+        rows = conn.execute("SELECT code, title FROM occupations ORDER BY code").fetchall()
+        return cls.build((code, title, occupation_features(sections.get(code, {}))) for code, title in rows)
+
+    def update(self, code: str, title: Optional[str], features: Dict[str, float]) -> bool:
+        """Ajoute ou remplace le vecteur d'un métier. Retourne False s'il est vide ou inchangé."""
+        vector = self._vector(features)
+        if vector is None:
+            return False
+        if title:
+            self.titles[code] = title
+        current = self.vector(code)
+        if current is not None and np.allclose(current, vector, atol=1e-6):
+            return False
+        self.delta[code] = vector
+        self.dirty = True
+        return True
+
+    def on_occupation(self, soc_code: str, data: Dict) -> None:
+        """
+        Écouteur du client API : chaque rapport récupéré enrichit l'index. Le vecteur étant
+        remplacé en entier, un rapport partiel (sections filtrées, en retard ou en erreur) est ignoré.
+        """
+        if any(is_error(data.get(section)) for section in VECTOR_SECTIONS):
+            return
+        summary = data.get("summary")
+        self.update(soc_code, None if is_error(summary) else summary.title, occupation_features(data))
+
+    # --- Persistance (.npy + .json) ---
+
+    def _merged(self) -> Tuple[List[str], np.ndarray]:
+        codes = [code for code in self.codes if code not in self.delta] + list(self.delta)
+        size = len(self.dims)
+        rows = [_pad(self.matrix[self.row_of[code]], size) for code in self.codes if code not in self.delta]
+        rows += [_pad(vector, size) for vector in self.delta.values()]
+        matrix = np.stack(rows) if rows else np.zeros((0, size), dtype=np.float32)
+        return codes, matrix
+
+    def _features(self, vector: np.ndarray) -> Dict[str, float]:
+        return {self.dims[i]: float(value) for i, value in enumerate(vector) if value}
+
+    def _write(self, path: str) -> None:
+        codes, matrix = self._merged()
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, matrix.astype(np.float32, copy=False))
+        with open(f"{tmp_path}.json", "w", encoding="utf-8") as f:
+            json.dump({"codes": codes, "titles": {c: self.titles.get(c, "") for c in codes}, "dims": self.dims},
+                      f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+        os.replace(f"{tmp_path}.json", f"{path}.json")
+
+    def save(self, path: str, merge: bool = True) -> None:
+        """
+        Écriture atomique, fusionnée sous verrou avec l'index sur disque : avec plusieurs workers,
+        chacun y ajoute les métiers qu'il a appris (`delta`) sans écraser ceux des autres.
+        merge=False : le fichier est remplacé par cet index (reconstruction à l'ingestion).
+        """
+        if not merge:
+            self._write(path)
+            self.dirty = False
+            return
+        with locked(path):
+            on_disk = SimilarityIndex.load(path) if os.path.isfile(path) else SimilarityIndex()
+            # Base de ce processus absente du fichier (fichier supprimé ou reconstruit entre-temps)
+            for code in self.codes:
+                if code not in on_disk and code not in self.delta:
+                    on_disk.update(code, self.titles.get(code), self._features(self.matrix[self.row_of[code]]))
+            for code, vector in self.delta.items():
+                on_disk.update(code, self.titles.get(code), self._features(vector))
+            on_disk._write(path)
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path: str) -> "SimilarityIndex":
+        with open(f"{path}.json", encoding="utf-8") as f:
+            data = json.load(f)
+        index = cls()
+        index.matrix = np.load(path, mmap_mode="r")
+        index.codes = data["codes"]
+        index.titles = data["titles"]
+        index.dims = data["dims"]
+        if index.matrix.shape != (len(index.codes), len(index.dims)):
+            raise ValueError(f"Index de similarité incohérent ({path}) : reconstruire l'index")
+        index.row_of = {code: row for row, code in enumerate(index.codes)}
+        index.dim_index = {key: i for i, key in enumerate(index.dims)}
+        return index
+
+    # --- Requêtes ---
+
+    def vector(self, code: str) -> Optional[np.ndarray]:
+        vector = self.delta.get(code)
+        if vector is None and code in self.row_of:
+            vector = self.matrix[self.row_of[code]]
+        return None if vector is None else _pad(vector, len(self.dims))
+
+    def similar(self, code: str, limit: int = 10) -> Optional[List[Tuple[str, str, float]]]:
+        """(code, titre, similarité) des métiers les plus proches ; None si le code n'est pas indexé."""
+        query = self.vector(code)
+        if query is None:
+            return None
+
+        # Produit matriciel unique sur la base (mmap), puis sur les vecteurs ajoutés
+        codes = list(self.codes)
+        scores = self.matrix @ query[:self.matrix.shape[1]] if len(codes) else np.zeros(0, dtype=np.float32)
+        if self.delta:
+            replaced = np.fromiter((c in self.delta for c in codes), dtype=bool, count=len(codes))
+            scores = np.where(replaced, -np.inf, scores)
+            delta = np.stack([_pad(v, len(self.dims)) for v in self.delta.values()])
+            codes += list(self.delta)
+            scores = np.concatenate([scores, delta @ query])
+        if code in self.row_of:
+            scores[self.row_of[code]] = -np.inf
+        if code in self.delta:
+            scores[len(self.codes) + list(self.delta).index(code)] = -np.inf
+
+        limit = min(limit, int(np.isfinite(scores).sum()))
+        if limit <= 0:
+            return []
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(codes[i], self.titles.get(codes[i], ""), round(float(scores[i]), 4)) for i in top]
@@ -0,0 +1,53 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class _Call:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Déduplication des appels concurrents identiques.
+    Tous les appelants d'une même clé attendent une seule tâche partagée :
+    - une erreur est propagée à tous les appelants ;
+    - l'annulation d'un appelant n'annule la tâche partagée que s'il était le dernier à l'attendre.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self.shared = 0  # nombre d'appels servis par une tâche déjà en vol
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _t, k=key, c=call: self._forget(k, c))
+        else:
+            self.shared += 1
+
+        call.waiters += 1
+        try:
+            # shield : annuler un appelant ne doit pas annuler les autres
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if call.task.cancelled() or call.waiters > 1:
+                raise
+            # Dernier appelant : plus personne n'attend le résultat
+            call.task.cancel()
+            self._forget(key, call)
+            raise
+        finally:
+            call.waiters -= 1
+
+    def _forget(self, key: Hashable, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
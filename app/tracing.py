@@ -0,0 +1,166 @@
+import json
+import logging
+import secrets
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional
+
+logger = logging.getLogger("onet-server")
+
+# Trace et span courants : hérités par les tâches asyncio (gather, SingleFlight...)
+_current_trace: ContextVar[Optional["Trace"]] = ContextVar("onet_trace", default=None)
+_current_span: ContextVar[Optional["Span"]] = ContextVar("onet_span", default=None)
+
+
+class Span:
+    __slots__ = ("span_id", "parent_id", "name", "start_ns", "end_ns", "attributes")
+
+    def __init__(self, name: str, parent_id: Optional[str] = None, start_ns: Optional[int] = None,
+                 attributes: Optional[Dict] = None):
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.start_ns = start_ns if start_ns is not None else time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = dict(attributes or {})
+
+    def set_attribute(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    def end(self, end_ns: Optional[int] = None) -> None:
+        if self.end_ns is None:
+            self.end_ns = end_ns if end_ns is not None else time.time_ns()
+
+
+class _NoopSpan:
+    """Span renvoyé hors trace : les attributs sont ignorés."""
+
+    def set_attribute(self, key: str, value) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Trace:
+    """
+    Arbre de spans d'un appel d'outil (un span racine, puis un span par appel
+    O*NET, formateur, sérialisation SSE...). Exportable au format JSON OTLP.
+    """
+
+    def __init__(self, name: str, **attributes):
+        self.trace_id = secrets.token_hex(16)
+        self.root = Span(name, attributes=attributes)
+        self.spans: List[Span] = [self.root]
+
+    def start_span(self, name: str, parent: Optional[Span] = None, **attributes) -> Span:
+        span = Span(name, (parent or self.root).span_id, attributes=attributes)
+        self.spans.append(span)
+        return span
+
+    def add_span(self, name: str, start_ns: int, end_ns: int, **attributes) -> Span:
+        """Span déjà mesuré (ex: sérialisation SSE, après la fin du handler)."""
+        span = Span(name, self.root.span_id, start_ns, attributes)
+        span.end(end_ns)
+        self.spans.append(span)
+        return span
+
+    def to_otlp(self, service: str = "onet-server") -> Dict:
+        """Format OTLP/JSON (resourceSpans), lisible par un collecteur OpenTelemetry."""
+        now = time.time_ns()
+        spans = []
+        for span in self.spans:
+            attributes = dict(span.attributes)
+            if span.end_ns is None:
+                # Ex: rafraîchissement en arrière-plan encore en vol à l'export
+                attributes["unfinished"] = True
+            item = {
+                "traceId": self.trace_id,
+                "spanId": span.span_id,
+                "name": span.name,
+                "kind": 1,
+                "startTimeUnixNano": str(span.start_ns),
+                "endTimeUnixNano": str(span.end_ns or now),
+                "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in attributes.items()],
+            }
+            if span.parent_id:
+                item["parentSpanId"] = span.parent_id
+            spans.append(item)
+        return {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service}}]},
+            "scopeSpans": [{"scope": {"name": "onet-server"}, "spans": spans}],
+        }]}
+
+    def render(self) -> str:
+        """Chronologie texte : décalage et durée de chaque span (ms), indentée par parent."""
+        children: Dict[Optional[str], List[Span]] = {}
+        for span in self.spans:
+            children.setdefault(span.parent_id, []).append(span)
+        origin = self.root.start_ns
+        lines = [f"Trace {self.trace_id}"]
+
+        def walk(span: Span, depth: int) -> None:
+            offset = (span.start_ns - origin) / 1e6
+            duration = f"{(span.end_ns - span.start_ns) / 1e6:.1f} ms" if span.end_ns else "en cours"
+            attributes = " ".join(f"{k}={v}" for k, v in span.attributes.items())
+            lines.append(f"{'  ' * depth}{span.name} +{offset:.1f} ms {duration} {attributes}".rstrip())
+            for child in sorted(children.get(span.span_id, []), key=lambda s: s.start_ns):
+                walk(child, depth + 1)
+
+        walk(self.root, 0)
+        return "\n".join(lines)
+
+
+def _otlp_value(value) -> Dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+@contextmanager
+def start_trace(name: str, **attributes) -> Iterator[Trace]:
+    """Démarre une trace : les spans ouverts dans ce contexte (et ses tâches) s'y rattachent."""
+    trace = Trace(name, **attributes)
+    trace_token = _current_trace.set(trace)
+    span_token = _current_span.set(trace.root)
+    try:
+        yield trace
+    finally:
+        trace.root.end()
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Span]:
+    """Span enfant du span courant ; sans trace active, ne fait rien (coût quasi nul)."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield NOOP_SPAN
+        return
+    current = trace.start_span(name, _current_span.get(), **attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.attributes["error"] = type(e).__name__
+        raise
+    finally:
+        current.end()
+        _current_span.reset(token)
+
+
+def export_trace(trace: Trace, path: Optional[str]) -> None:
+    """Ajoute la trace (une ligne JSON OTLP) au fichier donné."""
+    if not path:
+        return
+    try:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(trace.to_otlp()) + "\n")
+    except OSError as e:
+        logger.warning(f"Export de trace impossible ({path}) : {e}")
@@ -0,0 +1,136 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+from .filelock import locked
+from .models import is_error
+from .sections import SECTIONS
+
+logger = logging.getLogger("onet-server")
+
+
+class RequestStats:
+    """
+    Popularité des codes SOC demandés, persistée d'une exécution à l'autre
+    pour pré-charger au démarrage les métiers les plus demandés.
+    Avec plusieurs workers, chacun ajoute ses propres comptes à ceux du fichier.
+    """
+
+    def __init__(self, path: Optional[str] = None, counts: Optional[Dict[str, int]] = None):
+        self.path = path
+        self.counts = Counter(counts or {})
+        # Demandes de cette exécution, pas encore ajoutées au fichier
+        self.recorded = Counter()
+
+    @staticmethod
+    def _read(path: str) -> Counter:
+        if not os.path.isfile(path):
+            return Counter()
+        try:
+            with open(path, encoding="utf-8") as f:
+                return Counter(json.load(f))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Statistiques de warm-up illisibles ({path}) : {e}")
+            return Counter()
+
+    @classmethod
+    def load(cls, path: Optional[str]) -> "RequestStats":
+        return cls(path, cls._read(path) if path else None)
+
+    def record(self, soc_code: str) -> None:
+        code = (soc_code or "").strip().replace("'", "").replace('"', "")
+        if code:
+            self.counts[code] += 1
+            self.recorded[code] += 1
+
+    def top(self, n: int) -> List[str]:
+        return [code for code, _ in self.counts.most_common(n)]
+
+    def save(self) -> None:
+        """
+        Ajoute les demandes de cette exécution aux comptes du fichier (relus sous verrou :
+        les autres workers sauvegardent au même moment), écriture atomique.
+        """
+        if not self.path or not self.recorded:
+            return
+        with locked(self.path):
+            counts = self._read(self.path)
+            counts.update(self.recorded)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(dict(counts), f)
+            os.replace(tmp_path, self.path)
+        self.counts = counts
+        self.recorded.clear()
+
+
+def load_warmup_codes(path: Optional[str], stats: Optional[RequestStats] = None, top_n: int = 0) -> List[str]:
+    """
+    Codes à pré-charger : fichier (un code par ligne, # = commentaire)
+    puis les `top_n` codes les plus demandés lors de l'exécution précédente.
+    """
+    codes = []
+    if path:
+        try:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    code = line.split("#", 1)[0].strip()
+                    if code:
+                        codes.append(code)
+        except OSError as e:
+            logger.warning(f"Fichier de warm-up illisible ({path}) : {e}")
+    if stats is not None and top_n > 0:
+        codes += stats.top(top_n)
+    return list(dict.fromkeys(codes))
+
+
+def warmup_rate(client, share: float) -> float:
+    """
+    Débit du warm-up (codes/s) : part `share` du débit O*NET du client, chaque code
+    coûtant une requête par section. Le reste du quota reste disponible pour les
+    requêtes des utilisateurs. 0 = illimité (pas de limiteur amont).
+    """
+    limiter = getattr(client, "rate_limiter", None) or getattr(getattr(client, "fallback", None), "rate_limiter", None)
+    if limiter is None or limiter.rate <= 0:
+        return 0.0
+    return limiter.rate * min(max(share, 0.01), 1.0) / len(SECTIONS)
+
+
+async def warm_up(client, codes: Iterable[str], rate: float = 1.0, concurrency: int = 2) -> Dict:
+    """
+    Pré-charge les rapports complets des codes donnés, à débit contrôlé
+    (`rate` codes/seconde, `concurrency` codes en parallèle au maximum)
+    pour ne pas saturer le quota O*NET juste après un déploiement.
+    """
+    codes = list(codes)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    interval = 1.0 / rate if rate > 0 else 0.0
+    failures = 0
+    started = time.monotonic()
+
+    async def load(code: str) -> None:
+        nonlocal failures
+        async with semaphore:
+            data = await client.get_full_occupation_details(code)
+        if is_error(data.get("summary")):
+            failures += 1
+
+    tasks = []
+    try:
+        for code in codes:
+            tasks.append(asyncio.ensure_future(load(code)))
+            if interval:
+                await asyncio.sleep(interval)
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        failures += sum(isinstance(r, Exception) for r in results)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    result = {"codes": len(codes), "failures": failures, "seconds": round(time.monotonic() - started, 2)}
+    logger.info(f"Warm-up terminé : {result}")
+    return result
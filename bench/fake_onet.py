@@ -0,0 +1,142 @@
+"""
+Faux serveur O*NET Web Services pour les benchmarks (100 % hors ligne).
+
+Sert, pour chaque endpoint appelé par OnetClient, soit des réponses enregistrées
+(--fixtures DIR : un fichier <catégorie>.json par endpoint, ex: tasks.json, summary.json, search.json),
+soit des payloads synthétiques de taille réaliste. Latence, jitter et erreurs 429 sont configurables.
+
+Usage :
+    python -m bench.fake_onet --port 9100 --latency-ms 80 --jitter-ms 40 --rate-429 0.02
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+from collections import Counter
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from app.cache import endpoint_kind
+
+
+def synthetic_payload(kind: str, code: str, start: int = 1, end: int = 20) -> dict:
+    """Payload au format de l'API v2, déterministe pour un code donné."""
+    rng = random.Random(f"{kind}:{code}")
+    total = 40
+    window = range(start, min(end, total) + 1)
+
+    if kind == "search":
+        return {"occupation": [{"code": f"15-12{50 + i}.00", "title": f"Occupation {i}"} for i in range(end)]}
+    if kind == "summary":
+        return {"code": code, "title": f"Occupation {code}",
+                "description": "Research, design, and develop software systems. " * 3,
+                "sample_of_reported_titles": [f"Reported title {i}" for i in range(8)]}
+    if kind == "tasks":
+        return {"start": start, "end": end, "total": total, "task": [
+            {"id": i, "title": f"Task statement number {i} for {code}, with a realistic length sentence.",
+             "importance": rng.randint(40, 100), "category": rng.choice(["Core", "Supplemental"])}
+            for i in window]}
+    if kind == "technology_skills":
+        return {"start": start, "end": end, "total": total, "category": [
+            {"code": 43230000 + i, "title": f"Software category {i}",
+             "example": [{"title": f"Tool {i}.{j}", "hot_technology": rng.random() < 0.3,
+                          "in_demand": rng.random() < 0.2, "percentage": rng.randint(0, 60)}
+                         for j in range(4)],
+             "example_more": [{"title": f"Other tool {i}.{j}"} for j in range(6)]}
+            for i in window]}
+    if kind in ("skills", "knowledge", "abilities", "work_activities"):
+        return {"start": start, "end": end, "total": total, "element": [
+            {"id": f"2.A.{i}", "name": f"{kind} element {i}", "importance": rng.randint(20, 100),
+             "description": f"Description of {kind} element {i}, as provided by O*NET."}
+            for i in window]}
+    if kind == "education":
+        return {"response": [{"title": f"Education level {i}", "percentage_of_respondents": rng.randint(0, 60)}
+                             for i in range(6)]}
+    if kind == "detailed_work_activities":
+        return {"start": start, "end": end, "total": total, "activity": [
+            {"id": f"4.A.{i}", "title": f"Detailed work activity {i}"} for i in window]}
+    if kind == "job_zone":
+        return {"code": 4, "title": "Considerable Preparation Needed", "svp_range": "(7.0 to < 8.0)",
+                "education": "Most require a four-year bachelor's degree.",
+                "related_experience": "A considerable amount of work-related skill is needed.",
+                "job_training": "Several years of work-related experience."}
+    if kind == "work_context":
+        return {"start": start, "end": end, "total": total, "element": [
+            {"id": f"4.C.{i}", "name": f"Context {i}", "context": rng.randint(20, 100),
+             "response": [{"description": f"Answer {j}", "percentage_of_respondents": rng.randint(0, 100)}
+                          for j in range(5)]}
+            for i in window]}
+    return {"error": "Not Found"}
+
+
+def create_app(latency_ms: float = 50.0, jitter_ms: float = 20.0, rate_429: float = 0.0,
+               fixtures_dir: str = "") -> Starlette:
+    requests = Counter()
+    statuses = Counter()
+    fixtures = {}
+    if fixtures_dir:
+        for name in os.listdir(fixtures_dir):
+            if name.endswith(".json"):
+                with open(os.path.join(fixtures_dir, name), encoding="utf-8") as f:
+                    fixtures[name[:-5]] = json.load(f)
+
+    async def handle_api(request: Request):
+        path = request.url.path
+        kind = endpoint_kind(path)
+        requests[kind] += 1
+
+        delay = max(0.0, latency_ms + random.uniform(-jitter_ms, jitter_ms)) / 1000
+        await asyncio.sleep(delay)
+
+        if rate_429 and random.random() < rate_429:
+            statuses[429] += 1
+            return JSONResponse({"error": "Too Many Requests"}, status_code=429, headers={"Retry-After": "1"})
+
+        if kind in fixtures:
+            payload = fixtures[kind]
+        else:
+            code = path.split("/occupations/")[-1].split("/")[0] if "/occupations/" in path else ""
+            payload = synthetic_payload(kind, code,
+                                        int(request.query_params.get("start", 1)),
+                                        int(request.query_params.get("end", 20)))
+        status = 404 if "error" in payload else 200
+        statuses[status] += 1
+        return JSONResponse(payload, status_code=status)
+
+    async def handle_stats(request: Request):
+        return JSONResponse({"requests": dict(requests), "total": sum(requests.values()),
+                             "statuses": {str(k): v for k, v in statuses.items()}})
+
+    async def handle_reset(request: Request):
+        requests.clear()
+        statuses.clear()
+        return JSONResponse({"status": "reset"})
+
+    return Starlette(routes=[
+        Route("/_stats", endpoint=handle_stats),
+        Route("/_reset", endpoint=handle_reset, methods=["POST"]),
+        Route("/online/{path:path}", endpoint=handle_api),
+    ])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Faux serveur O*NET pour benchmarks.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Proportion de réponses 429 (0-1)")
+    parser.add_argument("--fixtures", default="", help="Dossier de réponses enregistrées (<catégorie>.json)")
+    args = parser.parse_args()
+
+    app = create_app(args.latency_ms, args.jitter_ms, args.rate_429, args.fixtures)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
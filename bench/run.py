@@ -0,0 +1,246 @@
+"""
+Benchmark de charge du serveur MCP contre le faux serveur O*NET (hors ligne).
+
+Lance bench.fake_onet et main.py en sous-processus, ouvre N sessions MCP SSE
+concurrentes (/sse + /messages) qui enchaînent des appels d'outils, puis produit
+un rapport JSON : débit, latences p50/p95/p99 par outil, requêtes amont, mémoire.
+Avec --transport mcp, les appels passent par l'endpoint sans état /mcp (utilisable avec --workers N).
+
+Usage :
+    python -m bench.run --sessions 20 --calls 10 --latency-ms 80 --rate-429 0.01 --output bench.json
+    python -m bench.run --transport mcp --workers 4 --sessions 40
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+from mcp.client.session import ClientSession
+from mcp.client.sse import sse_client
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SOC_CODES = ["15-1252.00", "15-1253.00", "15-1211.00", "15-1244.00", "29-1141.00",
+             "11-1021.00", "13-2011.00", "41-2031.00", "43-4051.00", "53-3032.00"]
+KEYWORDS = ["software", "nurse", "accountant", "driver", "analyst", "teacher"]
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return round(ordered[index], 2)
+
+
+def _descendants(pid: int) -> List[int]:
+    """Processus enfants (récursivement) de `pid`, via /proc (Linux)."""
+    children = defaultdict(list)
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return []
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # Le nom du processus (entre parenthèses) peut contenir des espaces : ppid après le dernier ")"
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children[ppid].append(int(entry))
+    found, stack = [], [pid]
+    while stack:
+        for child in children.get(stack.pop(), []):
+            found.append(child)
+            stack.append(child)
+    return found
+
+
+def memory_kb(pid: int) -> Dict[str, Optional[int]]:
+    """
+    RSS courant et pic (Linux, /proc ; None ailleurs), sommés sur le processus et ses enfants :
+    avec --workers N, le superviseur uvicorn ne fait que lancer les workers.
+    """
+    result = {"rss_kb": None, "peak_rss_kb": None, "processes": 0}
+    for process in [pid] + _descendants(pid):
+        try:
+            with open(f"/proc/{process}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        result["rss_kb"] = (result["rss_kb"] or 0) + int(line.split()[1])
+                    elif line.startswith("VmHWM:"):
+                        result["peak_rss_kb"] = (result["peak_rss_kb"] or 0) + int(line.split()[1])
+        except OSError:
+            continue
+        result["processes"] += 1
+    return result
+
+
+async def wait_ready(url: str, timeout: float = 20.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get(url, timeout=1.0)
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError(f"Serveur injoignable : {url}")
+
+
+def pick_call(rng: random.Random, mix: Dict[str, float]) -> tuple:
+    tool = rng.choices(list(mix), weights=list(mix.values()))[0]
+    if tool == "search_occupation":
+        return tool, {"keyword": rng.choice(KEYWORDS)}
+    if tool == "get_occupation_details_batch":
+        return tool, {"soc_codes": rng.sample(SOC_CODES, 3)}
+    return tool, {"soc_code": rng.choice(SOC_CODES)}
+
+
+async def run_session(url: str, calls: int, mix: Dict[str, float], seed: int,
+                      latencies: Dict[str, List[float]], errors: Dict[str, int]) -> None:
+    rng = random.Random(seed)
+    try:
+        async with sse_client(url) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                for _ in range(calls):
+                    tool, arguments = pick_call(rng, mix)
+                    started = time.perf_counter()
+                    try:
+                        result = await session.call_tool(tool, arguments)
+                        text = result.content[0].text if result.content else ""
+                        if result.isError or text.startswith("Error:"):
+                            errors[tool] += 1
+                    except Exception:
+                        errors[tool] += 1
+                        continue
+                    latencies[tool].append((time.perf_counter() - started) * 1000)
+    except Exception:
+        errors["session"] += 1
+
+
+async def run_stateless_session(url: str, calls: int, mix: Dict[str, float], seed: int,
+                                latencies: Dict[str, List[float]], errors: Dict[str, int]) -> None:
+    """Même charge que run_session, via POST /mcp (chaque appel peut tomber sur un worker différent)."""
+    rng = random.Random(seed)
+    async with httpx.AsyncClient(timeout=120.0) as client:
+        for i in range(calls):
+            tool, arguments = pick_call(rng, mix)
+            started = time.perf_counter()
+            try:
+                response = await client.post(url, json={"jsonrpc": "2.0", "id": i, "method": "tools/call",
+                                                        "params": {"name": tool, "arguments": arguments}})
+                result = response.json().get("result") or {}
+                text = result["content"][0]["text"] if result.get("content") else ""
+                if "error" in response.json() or result.get("isError") or text.startswith("Error:"):
+                    errors[tool] += 1
+            except Exception:
+                errors[tool] += 1
+                continue
+            latencies[tool].append((time.perf_counter() - started) * 1000)
+
+
+async def benchmark(args) -> Dict:
+    fake_url = f"http://127.0.0.1:{args.fake_port}"
+    server_url = f"http://127.0.0.1:{args.port}"
+
+    fake = subprocess.Popen(
+        [sys.executable, "-m", "bench.fake_onet", "--port", str(args.fake_port),
+         "--latency-ms", str(args.latency_ms), "--jitter-ms", str(args.jitter_ms),
+         "--rate-429", str(args.rate_429), "--fixtures", args.fixtures],
+        cwd=ROOT
+    )
+    env = dict(os.environ, ONET_BACKEND="api", ONET_API_KEY="bench", ONET_BASE_URL=fake_url,
+               PORT=str(args.port), ONET_WORKERS=str(args.workers))
+    server = subprocess.Popen([sys.executable, "main.py"], cwd=ROOT, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        await wait_ready(f"{fake_url}/_stats")
+        await wait_ready(f"{server_url}/messages")
+        async with httpx.AsyncClient() as client:
+            await client.post(f"{fake_url}/_reset")
+
+        mix = {"search_occupation": args.mix_search, "get_occupation_details": args.mix_details,
+               "get_occupation_details_batch": args.mix_batch}
+        latencies: Dict[str, List[float]] = defaultdict(list)
+        errors: Dict[str, int] = defaultdict(int)
+
+        if args.transport == "mcp":
+            session, url = run_stateless_session, f"{server_url}/mcp"
+        else:
+            session, url = run_session, f"{server_url}/sse"
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            session(url, args.calls, mix, args.seed + i, latencies, errors)
+            for i in range(args.sessions)
+        ))
+        elapsed = time.perf_counter() - started
+
+        async with httpx.AsyncClient() as client:
+            upstream = (await client.get(f"{fake_url}/_stats")).json()
+
+        all_latencies = [v for values in latencies.values() for v in values]
+        return {
+            "config": {k: v for k, v in vars(args).items() if k != "output"},
+            "duration_s": round(elapsed, 3),
+            "calls_ok": len(all_latencies),
+            "errors": dict(errors),
+            "throughput_calls_per_s": round(len(all_latencies) / elapsed, 2) if elapsed else None,
+            "latency_ms": {
+                tool: {"count": len(values), "p50": percentile(values, 50),
+                       "p95": percentile(values, 95), "p99": percentile(values, 99)}
+                for tool, values in sorted(latencies.items())
+            } | {"all": {"count": len(all_latencies), "p50": percentile(all_latencies, 50),
+                         "p95": percentile(all_latencies, 95), "p99": percentile(all_latencies, 99)}},
+            "upstream": upstream,
+            "memory": memory_kb(server.pid),
+        }
+    finally:
+        for proc in (server, fake):
+            proc.terminate()
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de charge du serveur MCP O*NET (hors ligne).")
+    parser.add_argument("--sessions", type=int, default=10, help="Sessions SSE concurrentes")
+    parser.add_argument("--calls", type=int, default=10, help="Appels d'outils par session")
+    parser.add_argument("--port", type=int, default=8100, help="Port du serveur MCP testé")
+    parser.add_argument("--transport", choices=["sse", "mcp"], default="sse",
+                        help="Sessions SSE ou endpoint sans état /mcp")
+    parser.add_argument("--workers", type=int, default=1, help="Workers uvicorn du serveur testé (ONET_WORKERS)")
+    parser.add_argument("--fake-port", type=int, default=9100, help="Port du faux serveur O*NET")
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--fixtures", default="", help="Dossier de réponses O*NET enregistrées")
+    parser.add_argument("--mix-search", type=float, default=0.3)
+    parser.add_argument("--mix-details", type=float, default=0.6)
+    parser.add_argument("--mix-batch", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="", help="Fichier JSON de sortie (défaut : stdout)")
+    args = parser.parse_args()
+
+    report = asyncio.run(benchmark(args))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
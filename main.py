@@ -3,15 +3,30 @@ import mcp.types as types
 from starlette.applications import Starlette
 from starlette.routing import Route
 from starlette.requests import Request
-from starlette.responses import JSONResponse
+from starlette.responses import JSONResponse, PlainTextResponse, Response
 from sse_starlette.sse import EventSourceResponse
 import uvicorn
 import logging
 import anyio
 import uuid
+import asyncio
+import time
+from typing import get_args
+from weakref import WeakKeyDictionary
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
 from dotenv import load_dotenv
-from app.client import OnetClient
+from pydantic import ValidationError
+from app.backend import create_backend
 from app import logic
+from app.config import env_bool, env_float, env_int, env_str
+from app.metrics import REGISTRY, Counter, Gauge, Histogram
+from app.warmup import RequestStats, load_warmup_codes, warm_up, warmup_rate
+from app.budget import CHARS_PER_TOKEN, STYLES, budget_chars
+from app.reverse_index import KINDS, RANKINGS
+from app.sections import OPTIONAL_SECTIONS
+from app.sessions import SseSession, reap_when_idle
+from app.tracing import Trace, export_trace, start_trace
 
 # Configuration du logging (pour la prod)
 logging.basicConfig(level=logging.INFO)
@@ -20,60 +35,311 @@ logger = logging.getLogger("onet-server")
 load_dotenv()
 
 server = Server("onet-server")
+BATCH_MAX_CODES = env_int("ONET_BATCH_MAX_CODES", 25)
+
+# Sections optionnelles du rapport (défaut : toutes)
+SECTIONS_SCHEMA = {"type": "array", "items": {"type": "string", "enum": list(OPTIONAL_SECTIONS)},
+                   "description": "Sections à inclure (défaut : rapport complet)"}
+# Rendu compact sous budget (app/budget.py)
+BUDGET_PROPERTIES = {
+    "format": {"type": "string", "enum": list(STYLES),
+               "description": "markdown (défaut), terse (sans descriptions ni emojis) ou json (structuré)"},
+    "max_chars": {"type": "integer", "minimum": 200,
+                  "description": "Taille cible du rapport en caractères : seuls les meilleurs éléments sont gardés"},
+    "max_tokens": {"type": "integer", "minimum": 50,
+                   "description": f"Taille cible en tokens (estimée à {CHARS_PER_TOKEN} caractères par token)"},
+}
+COMPLETE_SCHEMA = {"type": "boolean",
+                   "description": "Listes complètes (toutes les pages O*NET, sans plafond d'affichage) "
+                                  "au lieu des premiers éléments"}
 try:
-    onet_client = OnetClient()
+    onet_client = create_backend()
 except ValueError as e:
     logger.error(f"Erreur de configuration critique : {e}")
     exit(1)
 
+# --- MÉTRIQUES ---
+TOOL_LATENCY = Histogram("onet_tool_duration_seconds", "Durée des appels d'outils MCP", ["tool"])
+TOOL_ERRORS = Counter("onet_tool_errors_total", "Appels d'outils MCP en erreur", ["tool"])
+
+
+def register_cache_metrics(cache) -> None:
+    """Gauges lues au scrape depuis les compteurs du cache de réponses."""
+    Gauge("onet_cache_entries", "Réponses O*NET en cache", fn=lambda: len(cache))
+    Gauge("onet_cache_bytes", "Taille du cache de réponses (octets)", fn=lambda: cache.total_bytes)
+    Counter("onet_cache_hits_total", "Hits du cache (frais + périmés)", fn=lambda: cache.hits + cache.stale_hits)
+    Counter("onet_cache_misses_total", "Miss du cache", fn=lambda: cache.misses)
+    Counter("onet_cache_evictions_total", "Évictions LRU du cache", fn=lambda: cache.evictions)
+    Gauge("onet_cache_hit_ratio", "Taux de hit du cache", fn=lambda: cache.stats()["hit_ratio"])
+
+
+def register_disk_cache_metrics(disk) -> None:
+    """Compteurs du cache disque (ONET_DISK_CACHE), propres à ce processus."""
+    Gauge("onet_disk_cache_bytes", "Taille du cache disque (octets, tous workers)", fn=lambda: disk.total_bytes)
+    Counter("onet_disk_cache_hits_total", "Réponses servies par le cache disque", fn=lambda: disk.hits)
+    Counter("onet_disk_cache_revalidated_total", "Entrées revalidées par O*NET (304)", fn=lambda: disk.revalidated)
+    Counter("onet_disk_cache_misses_total", "Absences d'entrée fraîche sur disque", fn=lambda: disk.misses)
+    Counter("onet_disk_cache_evictions_total", "Évictions du cache disque", fn=lambda: disk.evictions)
+
+
+# Le cache est celui du client API (ou du repli API en mode hors ligne)
+_api_client = getattr(onet_client, "fallback", None) or onet_client
+if hasattr(_api_client, "cache"):
+    register_cache_metrics(_api_client.cache)
+if getattr(_api_client, "disk_cache", None) is not None:
+    register_disk_cache_metrics(_api_client.disk_cache)
+
+# --- TRACES ---
+# ONET_TRACE_FILE : export JSON OTLP (une ligne par appel) ; ONET_TRACE_DEBUG : chronologie jointe au résultat
+TRACE_FILE = env_str("ONET_TRACE_FILE")
+TRACE_DEBUG = env_bool("ONET_TRACE_DEBUG", False)
+# Traces en attente de la sérialisation SSE de leur réponse (par session, clé = id JSON-RPC)
+pending_traces: ContextVar[dict | None] = ContextVar("pending_traces", default=None)
+
+# Popularité des codes SOC (sert au warm-up du prochain démarrage)
+request_stats = RequestStats.load(env_str("ONET_WARMUP_STATS"))
+
 
 # --- OUTILS ---
 @server.list_tools()
 async def handle_list_tools() -> list[types.Tool]:
     return [
         types.Tool(name="search_occupation", description="Recherche métier",
-                   inputSchema={"type": "object", "properties": {"keyword": {"type": "string"}},
+                   inputSchema={"type": "object",
+                                "properties": {"keyword": {"type": "string"},
+                                               "limit": {"type": "integer", "minimum": 1, "maximum": 50,
+                                                         "description": "Nombre max de résultats"}},
                                 "required": ["keyword"]}),
         types.Tool(name="get_occupation_details", description="Détails métier SOC",
-                   inputSchema={"type": "object", "properties": {"soc_code": {"type": "string"}},
-                                "required": ["soc_code"]})
+                   inputSchema={"type": "object",
+                                "properties": {"soc_code": {"type": "string"}, "sections": SECTIONS_SCHEMA,
+                                               "complete": COMPLETE_SCHEMA,
+                                               "stream": {"type": "boolean",
+                                                          "description": "Envoie chaque section dès réception "
+                                                                         "(notifications MCP) avant le rapport final"},
+                                               **BUDGET_PROPERTIES},
+                                "required": ["soc_code"]}),
+        types.Tool(name="get_occupation_details_batch", description="Détails de plusieurs métiers SOC en un appel",
+                   inputSchema={"type": "object",
+                                "properties": {"soc_codes": {"type": "array", "items": {"type": "string"},
+                                                             "minItems": 1, "maxItems": BATCH_MAX_CODES},
+                                               "sections": SECTIONS_SCHEMA, "complete": COMPLETE_SCHEMA,
+                                               **BUDGET_PROPERTIES},
+                                "required": ["soc_codes"]}),
+        types.Tool(name="get_related_occupations",
+                   description="Métiers les plus proches d'un code SOC (compétences, connaissances, "
+                               "capacités et activités)",
+                   inputSchema={"type": "object",
+                                "properties": {"soc_code": {"type": "string"},
+                                               "limit": {"type": "integer", "minimum": 1, "maximum": 50,
+                                                         "description": "Nombre de métiers (défaut : 10)"}},
+                                "required": ["soc_code"]}),
+        types.Tool(name="find_occupations",
+                   description="Métiers utilisant une technologie (ex: Python), une compétence, "
+                               "une connaissance ou une activité détaillée",
+                   inputSchema={"type": "object",
+                                "properties": {"kind": {"type": "string", "enum": list(KINDS)},
+                                               "query": {"type": "string"},
+                                               "limit": {"type": "integer", "minimum": 1, "maximum": 50,
+                                                         "description": "Nombre de métiers (défaut : 10)"},
+                                               "rank": {"type": "string", "enum": list(RANKINGS),
+                                                        "description": "Classement : importance (défaut), "
+                                                                       "technologies hot ou in demand d'abord"}},
+                                "required": ["kind", "query"]})
     ]
 
 
+# Niveaux de log MCP, du plus bavard au plus grave
+LOG_LEVELS = get_args(types.LoggingLevel)
+# Niveau minimal demandé par chaque session (logging/setLevel) ; par défaut tous les messages
+session_log_levels: "WeakKeyDictionary[object, str]" = WeakKeyDictionary()
+
+
+@server.set_logging_level()
+async def handle_set_logging_level(level: types.LoggingLevel) -> None:
+    # Déclare aussi la capacité `logging` à l'initialisation (requise pour notifications/message)
+    try:
+        session_log_levels[server.request_context.session] = level
+    except LookupError:
+        # Transport sans session (/mcp) : aucun message de log n'est envoyé
+        pass
+
+
+def stream_to_session() -> logic.SectionCallback | None:
+    """
+    Transmet chaque section du rapport sur la session SSE en cours, seulement si le client
+    a fourni un progressToken (il attend alors des notifications et les consomme) :
+    notification de progression et message de log contenant le Markdown de la section
+    (si le niveau demandé par le client l'autorise).
+    """
+    try:
+        ctx = server.request_context
+    except LookupError:
+        # Transport sans session (/mcp) : pas de notifications, rapport final seulement
+        return None
+    progress_token = ctx.meta.progressToken if ctx.meta else None
+    if progress_token is None:
+        # Sans progressToken, des notifications non lues bloqueraient certains clients : rapport final seulement
+        return None
+    send_log = LOG_LEVELS.index(session_log_levels.get(ctx.session, "debug")) <= LOG_LEVELS.index("info")
+
+    async def on_section(section: str, text: str, done: int, total: int) -> None:
+        await ctx.session.send_progress_notification(progress_token, done, total)
+        if send_log:
+            await ctx.session.send_log_message(
+                "info", {"section": section, "progress": f"{done}/{total}", "content": text},
+                logger="onet-stream"
+            )
+
+    return on_section
+
+
+def defer_trace_export(trace: Trace) -> None:
+    """Exporte la trace après l'envoi SSE de la réponse (span de sérialisation), sinon tout de suite."""
+    if not TRACE_FILE:
+        return
+    traces = pending_traces.get()
+    try:
+        request_id = server.request_context.request_id
+    except LookupError:
+        request_id = None
+    if traces is None or request_id is None:
+        export_trace(trace, TRACE_FILE)
+    else:
+        traces[request_id] = trace
+
+
 @server.call_tool()
 async def handle_call_tool(name: str, arguments: dict | None) -> list[types.TextContent]:
     if not arguments: raise ValueError("Args required")
-    try:
-        if name == "search_occupation":
-            res = await logic.search_occupation_logic(onet_client, arguments.get("keyword"))
-        elif name == "get_occupation_details":
-            res = await logic.get_details_logic(onet_client, arguments.get("soc_code"))
-        else:
-            raise ValueError(f"Unknown tool: {name}")
-        return [types.TextContent(type="text", text=res)]
-    except Exception as e:
-        logger.error(f"Erreur outil {name}: {e}")
-        return [types.TextContent(type="text", text=f"Error: {str(e)}")]
+    if not (TRACE_FILE or TRACE_DEBUG) or not name.startswith("get_occupation_details"):
+        return await call_tool(name, arguments)
+
+    soc_codes = arguments.get("soc_codes") or [arguments.get("soc_code") or ""]
+    with start_trace(f"tools/call {name}", tool=name, soc_code=",".join(map(str, soc_codes))) as trace:
+        content = await call_tool(name, arguments)
+    if TRACE_DEBUG:
+        content.append(types.TextContent(type="text", text=trace.render()))
+    defer_trace_export(trace)
+    return content
+
+
+async def call_tool(name: str, arguments: dict) -> list[types.TextContent]:
+    with TOOL_LATENCY.time(name):
+        try:
+            if name.startswith("get_occupation_details"):
+                for code in arguments.get("soc_codes") or [arguments.get("soc_code") or ""]:
+                    request_stats.record(code)
+
+            # Rendu compact demandé (rapport par défaut sinon)
+            style = arguments.get("format") or "markdown"
+            max_chars = budget_chars(arguments.get("max_chars"), arguments.get("max_tokens"))
+
+            if name == "search_occupation":
+                res = await logic.search_occupation_logic(onet_client, arguments.get("keyword"),
+                                                          arguments.get("limit"))
+            elif name == "get_occupation_details" and arguments.get("stream"):
+                res = await logic.stream_details_logic(onet_client, arguments.get("soc_code"),
+                                                       arguments.get("sections"), stream_to_session(),
+                                                       bool(arguments.get("complete")), max_chars, style)
+            elif name == "get_occupation_details":
+                res = await logic.get_details_logic(onet_client, arguments.get("soc_code"),
+                                                    arguments.get("sections"), bool(arguments.get("complete")),
+                                                    max_chars, style)
+            elif name == "get_occupation_details_batch":
+                res = await logic.get_details_batch_logic(onet_client, arguments.get("soc_codes") or [],
+                                                          BATCH_MAX_CODES, arguments.get("sections"),
+                                                          bool(arguments.get("complete")), max_chars, style)
+            elif name == "get_related_occupations":
+                res = await logic.related_occupations_logic(onet_client, arguments.get("soc_code") or "",
+                                                            arguments.get("limit") or 10)
+            elif name == "find_occupations":
+                res = await logic.find_occupations_logic(onet_client, arguments.get("kind") or "",
+                                                         arguments.get("query") or "", arguments.get("limit") or 10,
+                                                         arguments.get("rank") or "importance")
+            else:
+                raise ValueError(f"Unknown tool: {name}")
+            return [types.TextContent(type="text", text=res)]
+        except Exception as e:
+            logger.error(f"Erreur outil {name}: {e}")
+            TOOL_ERRORS.inc(name)
+            return [types.TextContent(type="text", text=f"Error: {str(e)}")]
 
 
 # --- GESTION DES SESSIONS ET STREAMS ---
 
-active_connections = {}
+MAX_SESSIONS = env_int("ONET_MAX_SESSIONS", 100)
+SESSION_RETRY_AFTER = env_int("ONET_SESSION_RETRY_AFTER", 5)
+SESSION_IDLE_TIMEOUT = env_float("ONET_SESSION_IDLE_TIMEOUT", 300.0)
+SESSION_BUFFER = env_int("ONET_SESSION_BUFFER", 10)
+SSE_PING = env_int("ONET_SSE_PING", 15)
+SSE_SEND_TIMEOUT = env_float("ONET_SSE_SEND_TIMEOUT", 30.0)
+
+# session_id -> SseSession
+active_connections: dict[str, SseSession] = {}
+Gauge("onet_active_sessions", "Sessions SSE ouvertes", fn=lambda: len(active_connections))
+SESSIONS_REJECTED = Counter("onet_sessions_rejected_total",
+                            "Connexions ou messages refusés (limit = plafond de sessions, busy = session saturée)",
+                            ["reason"])
+SESSIONS_REAPED = Counter("onet_sessions_reaped_total", "Sessions SSE fermées pour inactivité")
+
+
+def overloaded(reason: str, detail: str) -> JSONResponse:
+    SESSIONS_REJECTED.inc(reason)
+    return JSONResponse({"error": "Service Unavailable", "detail": detail}, status_code=503,
+                        headers={"Retry-After": str(SESSION_RETRY_AFTER)})
+
+
+class SessionEventSourceResponse(EventSourceResponse):
+    """Flux SSE qui libère la place de sa session même si le flux n'est jamais parcouru."""
+
+    def __init__(self, release, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.release = release
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.release()
+
 
 async def handle_sse(request: Request):
+    if MAX_SESSIONS > 0 and len(active_connections) >= MAX_SESSIONS:
+        return overloaded("limit", f"Nombre maximal de sessions atteint ({MAX_SESSIONS})")
+
     session_id = str(uuid.uuid4())
 
-    async def event_generator():
-        in_send, in_recv = anyio.create_memory_object_stream(10)
-        out_send, out_recv = anyio.create_memory_object_stream(10)
+    # Flux bornés : un client lent bloque server.run (backpressure) au lieu de faire grossir la mémoire
+    in_send, in_recv = anyio.create_memory_object_stream(SESSION_BUFFER)
+    out_send, out_recv = anyio.create_memory_object_stream(SESSION_BUFFER)
+    session = SseSession(session_id, in_send)
+    # Place réservée avant de répondre (et non au début du flux) : des connexions simultanées
+    # ne peuvent pas toutes passer le contrôle du plafond
+    active_connections[session_id] = session
+
+    def release() -> None:
+        active_connections.pop(session_id, None)
+        session.close()
+        for stream in (in_recv, out_send, out_recv):
+            stream.close()
 
-        active_connections[session_id] = in_send
+    async def event_generator():
+        # Hérité par server.run (contexte copié par start_soon)
+        traces = {}
+        pending_traces.set(traces)
 
         init_options = server.create_initialization_options()
 
+        async def reap() -> None:
+            if await reap_when_idle(session, SESSION_IDLE_TIMEOUT):
+                SESSIONS_REAPED.inc()
+
         try:
             async with anyio.create_task_group() as tg:
                 tg.start_soon(server.run, in_recv, out_send, init_options)
+                if SESSION_IDLE_TIMEOUT > 0:
+                    tg.start_soon(reap)
 
                 yield {
                     "event": "endpoint",
@@ -81,12 +347,26 @@ async def handle_sse(request: Request):
                 }
 
                 async for message in out_recv:
+                    session.touch()
+                    if isinstance(message, types.JSONRPCMessage) and \
+                            isinstance(message.root, (types.JSONRPCResponse, types.JSONRPCError)):
+                        session.pending = max(0, session.pending - 1)
                     try:
                         if isinstance(message, types.JSONRPCMessage):
+                            trace = None
+                            if traces and isinstance(message.root, types.JSONRPCResponse):
+                                trace = traces.pop(message.root.id, None)
+                            serialize_start = time.time_ns()
+                            data = message.model_dump_json()
+                            serialize_end = time.time_ns()
                             yield {
                                 "event": "message",
-                                "data": message.model_dump_json()
+                                "data": data
                             }
+                            if trace is not None:
+                                trace.add_span("sse.serialize", serialize_start, serialize_end, bytes=len(data))
+                                trace.add_span("sse.send", serialize_end, time.time_ns())
+                                export_trace(trace, TRACE_FILE)
                         elif isinstance(message, Exception):
                             logger.error(f"Erreur interne MCP: {message}")
                             yield {
@@ -97,13 +377,18 @@ async def handle_sse(request: Request):
                         logger.error(f"Erreur yield SSE: {e}")
                         raise
 
+                # server.run terminé (session fermée) : on arrête aussi le reaper
+                tg.cancel_scope.cancel()
+
         except Exception as e:
             logger.error(f"Session crash {session_id}: {e}")
         finally:
-            if session_id in active_connections:
-                del active_connections[session_id]
+            release()
 
-    return EventSourceResponse(event_generator())
+    # ping : keep-alive qui détecte aussi les connexions à moitié ouvertes ;
+    # send_timeout : un client qui ne lit plus son flux est déconnecté
+    return SessionEventSourceResponse(release, event_generator(), ping=SSE_PING,
+                                      send_timeout=SSE_SEND_TIMEOUT or None)
 
 
 async def handle_messages(request: Request):
@@ -115,24 +400,157 @@ async def handle_messages(request: Request):
         data = await request.json()
         message = types.JSONRPCMessage.model_validate(data)
 
-        write_stream = active_connections[session_id]
-        await write_stream.send(message)
+        session = active_connections[session_id]
+        session.touch()
+        # Compté avant l'envoi : la réponse peut partir (et décrémenter) avant la fin d'un send bloqué
+        is_request = isinstance(message.root, types.JSONRPCRequest)
+        if is_request:
+            session.pending += 1
+        try:
+            # Session saturée (client qui ne consomme plus ses réponses) : on refuse plutôt que d'empiler
+            with anyio.fail_after(SSE_SEND_TIMEOUT or None):
+                await session.in_send.send(message)
+        except (TimeoutError, anyio.BrokenResourceError, anyio.ClosedResourceError):
+            if is_request:
+                session.pending = max(0, session.pending - 1)
+            raise
 
         return JSONResponse({"status": "accepted"}, status_code=202)
 
-    except anyio.BrokenResourceError:
+    except TimeoutError:
+        return overloaded("busy", "Session saturée, réessayez plus tard")
+    except (anyio.BrokenResourceError, anyio.ClosedResourceError, KeyError):
         return JSONResponse({"error": "Stream connection closed"}, status_code=410)
     except Exception as e:
         logger.error(f"Erreur handle_messages: {e}")
         return JSONResponse({"error": str(e)}, status_code=500)
 
 
+# --- TRANSPORT SANS ÉTAT (multi-workers) ---
+
+# Méthodes JSON-RPC connues du protocole (ex: "tools/call"), pour distinguer méthode inconnue et paramètres invalides
+CLIENT_METHODS = {get_args(request_type.model_fields["method"].annotation)[0]
+                  for request_type in get_args(types.ClientRequest.model_fields["root"].annotation)}
+
+
+def jsonrpc_error(request_id, code: int, message: str) -> dict:
+    return {"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": message}}
+
+
+async def dispatch_stateless(data) -> dict | None:
+    """
+    Une requête JSON-RPC traitée sans session, avec les mêmes handlers que server.run :
+    n'importe quel worker peut répondre, aucun état n'est partagé entre deux requêtes.
+    """
+    request_id = data.get("id") if isinstance(data, dict) else None
+    try:
+        message = types.JSONRPCMessage.model_validate(data)
+    except ValidationError:
+        return jsonrpc_error(request_id, types.INVALID_REQUEST, "Invalid request")
+    if not isinstance(message.root, types.JSONRPCRequest):
+        # Notification (ex: notifications/initialized) : rien à répondre
+        return None
+    if message.root.method not in CLIENT_METHODS:
+        return jsonrpc_error(request_id, types.METHOD_NOT_FOUND, "Method not found")
+    try:
+        req = types.ClientRequest.model_validate(
+            message.root.model_dump(by_alias=True, mode="json", exclude_none=True)
+        ).root
+    except ValidationError:
+        return jsonrpc_error(request_id, types.INVALID_PARAMS, f"Invalid params for {message.root.method}")
+
+    if isinstance(req, types.InitializeRequest):
+        options = server.create_initialization_options()
+        result = types.ServerResult(types.InitializeResult(
+            protocolVersion=types.LATEST_PROTOCOL_VERSION,
+            capabilities=options.capabilities,
+            serverInfo=types.Implementation(name=options.server_name, version=options.server_version)
+        ))
+    elif type(req) in server.request_handlers:
+        try:
+            result = await server.request_handlers[type(req)](req)
+        except Exception as e:
+            logger.error(f"Erreur /mcp {type(req).__name__}: {e}")
+            return jsonrpc_error(request_id, types.INTERNAL_ERROR, str(e))
+    else:
+        return jsonrpc_error(request_id, types.METHOD_NOT_FOUND, "Method not found")
+
+    return {"jsonrpc": "2.0", "id": request_id,
+            "result": result.model_dump(by_alias=True, mode="json", exclude_none=True)}
+
+
+async def handle_mcp(request: Request):
+    """POST /mcp : requête JSON-RPC (ou lot) -> réponse JSON, sans session SSE."""
+    try:
+        data = await request.json()
+    except ValueError:
+        return JSONResponse(jsonrpc_error(None, types.PARSE_ERROR, "Parse error"), status_code=400)
+
+    if isinstance(data, list):
+        responses = [r for r in await asyncio.gather(*(dispatch_stateless(m) for m in data)) if r is not None]
+        return JSONResponse(responses) if responses else Response(status_code=202)
+
+    response = await dispatch_stateless(data)
+    return JSONResponse(response) if response is not None else Response(status_code=202)
+
+
+async def handle_metrics(request: Request):
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 routes = [
     Route("/sse", endpoint=handle_sse),
-    Route("/messages", endpoint=handle_messages, methods=["POST"])
+    Route("/messages", endpoint=handle_messages, methods=["POST"]),
+    Route("/mcp", endpoint=handle_mcp, methods=["POST"]),
+    Route("/metrics", endpoint=handle_metrics)
 ]
 
-starlette_app = Starlette(routes=routes)
+@asynccontextmanager
+async def lifespan(app: Starlette):
+    # Warm-up : pré-chargement à débit contrôlé des codes SOC les plus demandés
+    codes = load_warmup_codes(env_str("ONET_WARMUP_FILE"), request_stats, env_int("ONET_WARMUP_TOP", 0))
+    warmup_task = None
+    if codes:
+        logger.info(f"Warm-up de {len(codes)} codes SOC en arrière-plan")
+        warmup_task = asyncio.create_task(warm_up(
+            onet_client, codes,
+            # Par défaut, une fraction du quota O*NET : les requêtes des utilisateurs passent avant
+            rate=env_float("ONET_WARMUP_RATE", 0.0) or warmup_rate(onet_client, env_float("ONET_WARMUP_SHARE", 0.25)),
+            concurrency=env_int("ONET_WARMUP_CONCURRENCY", 2)
+        ))
+
+    # Le pool HTTP (ou la base locale) vit aussi longtemps que le serveur
+    try:
+        yield
+    finally:
+        if warmup_task is not None:
+            warmup_task.cancel()
+        # Ferme les flux SSE encore ouverts (sinon uvicorn attend leur déconnexion)
+        for session in list(active_connections.values()):
+            session.close()
+        try:
+            request_stats.save()
+        except OSError as e:
+            logger.warning(f"Sauvegarde des statistiques de warm-up impossible : {e}")
+        # Métiers ajoutés aux index (similarité, index inversé) pendant l'exécution
+        for index, path in ((onet_client.similarity_index, env_str("ONET_SIMILARITY_INDEX")),
+                            (onet_client.reverse_index, env_str("ONET_REVERSE_INDEX"))):
+            if path and index.dirty:
+                try:
+                    index.save(path)
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Sauvegarde de l'index impossible ({path}) : {e}")
+        logger.info(f"Stats O*NET : {onet_client.stats()}")
+        await onet_client.aclose()
+
+
+starlette_app = Starlette(routes=routes, lifespan=lifespan)
 
 if __name__ == "__main__":
-    uvicorn.run(starlette_app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    workers = env_int("ONET_WORKERS", 1)
+    if workers > 1:
+        # Chaque worker a ses propres sessions SSE : seul /mcp (sans état) est sûr derrière plusieurs workers
+        logger.warning(f"{workers} workers : utilisez /mcp, les sessions /sse ne sont pas partagées entre processus")
+        uvicorn.run("main:starlette_app", host="0.0.0.0", port=env_int("PORT", 8000), workers=workers)
+    else:
+        uvicorn.run(starlette_app, host="0.0.0.0", port=env_int("PORT", 8000))
\ No newline at end of file